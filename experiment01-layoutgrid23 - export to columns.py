@@ -1,26 +1,788 @@
 import tkinter as tk
-from tkinter import filedialog, simpledialog, messagebox
+from tkinter import filedialog, simpledialog, messagebox, ttk, colorchooser
 import json
 from spellchecker import SpellChecker
 import csv
-import string
+import sys
+import re
+import bisect
+import threading
+import time
+import os
+import array
+import hashlib
+import struct
+import unicodedata
+import zlib
+import mmap
+import argparse
+import functools
+import collections
+import multiprocessing
+import queue
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 
 highlight_errors = False  # State for highlight toggle
 highlight_specific_word_active = False  # State for specific word highlight toggle
 font_size = 14  # Initial font size
 
+# Folder for files the app keeps between runs (indexes, caches, settings)
+APP_DATA_DIR = os.path.join(os.path.expanduser("~"), ".writingtool")
+
+# Compiled dictionary: a sorted word array the spell service can memory-map and
+# binary-search instead of parsing pyspellchecker's JSON into a dict. Layout
+# (all little-endian): magic, metadata size and word count (<QQ), JSON metadata,
+# word count + 1 end offsets (<I) into the word blob, one frequency per word (<Q),
+# then the sorted UTF-8 words back to back. Build it with the build-dictionary command.
+COMPILED_DICTIONARY_MAGIC = b"WTDICT01"
+COMPILED_DICTIONARY_PATH = os.path.join(APP_DATA_DIR, "dictionary.wtdict")
+
+# Function to hash a dictionary's contents, the same way for every dictionary format
+def get_dictionary_version(word_counts):
+    digest = hashlib.sha1()
+    for word, count in sorted(word_counts):
+        digest.update(f"{word}\t{count}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+# Function to write a compiled dictionary from (word, frequency) pairs
+def write_compiled_dictionary(path, word_counts):
+    word_counts = sorted(word_counts)
+    words_blob = bytearray()
+    offsets = [0]
+    for word, count in word_counts:
+        words_blob += word.encode("utf-8")
+        offsets.append(len(words_blob))
+    metadata = json.dumps({
+        "version": get_dictionary_version(word_counts),
+        "longest_word_length": max((len(word) for word, count in word_counts), default=0),
+        "letters": "".join(sorted({char for word, count in word_counts for char in word})),
+    }).encode("utf-8")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, 'wb') as dictionary_file:
+        dictionary_file.write(COMPILED_DICTIONARY_MAGIC + struct.pack("<QQ", len(metadata), len(word_counts)))
+        dictionary_file.write(metadata)
+        dictionary_file.write(struct.pack(f"<{len(offsets)}I", *offsets))
+        dictionary_file.write(struct.pack(f"<{len(word_counts)}Q", *(count for word, count in word_counts)))
+        dictionary_file.write(words_blob)
+    os.replace(temp_path, path)
+
+# A compiled dictionary opened with mmap. It answers the same questions the spell
+# service asks a SpellChecker (membership, frequency, candidates) without loading it.
+class CompiledDictionary:
+    def __init__(self, path):
+        with open(path, 'rb') as dictionary_file:
+            self.data = mmap.mmap(dictionary_file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.data[:len(COMPILED_DICTIONARY_MAGIC)] != COMPILED_DICTIONARY_MAGIC:
+            raise ValueError(f"{path} is not a compiled dictionary")
+        metadata_size, self.word_count = struct.unpack_from("<QQ", self.data, len(COMPILED_DICTIONARY_MAGIC))
+        metadata_start = len(COMPILED_DICTIONARY_MAGIC) + 16
+        metadata = json.loads(self.data[metadata_start:metadata_start + metadata_size])
+        self.version = metadata["version"]
+        self.longest_word_length = metadata["longest_word_length"]
+        self.letters = metadata["letters"]
+        self.offsets_start = metadata_start + metadata_size
+        self.counts_start = self.offsets_start + 4 * (self.word_count + 1)
+        self.words_start = self.counts_start + 8 * self.word_count
+        self.word_set = None  # Filled in the first time candidates are needed
+
+    def __len__(self):
+        return self.word_count
+
+    def word_bytes(self, position):
+        start, end = struct.unpack_from("<II", self.data, self.offsets_start + 4 * position)
+        return self.data[self.words_start + start:self.words_start + end]
+
+    def find(self, word):
+        key = word.lower().encode("utf-8")
+        low, high = 0, self.word_count
+        while low < high:
+            mid = (low + high) // 2
+            if self.word_bytes(mid) < key:
+                low = mid + 1
+            else:
+                high = mid
+        if low < self.word_count and self.word_bytes(low) == key:
+            return low
+        return -1
+
+    def __contains__(self, word):
+        return self.find(word) >= 0
+
+    def __getitem__(self, word):
+        position = self.find(word)
+        if position < 0:
+            return 0
+        return struct.unpack_from("<Q", self.data, self.counts_start + 8 * position)[0]
+
+    def __iter__(self):
+        for position in range(self.word_count):
+            yield self.word_bytes(position).decode("utf-8")
+
+    def edits1(self, word):
+        splits = [(word[:i], word[i:]) for i in range(len(word) + 1)]
+        deletes = [left + right[1:] for left, right in splits if right]
+        transposes = [left + right[1] + right[0] + right[2:] for left, right in splits if len(right) > 1]
+        replaces = [left + char + right[1:] for left, right in splits if right for char in self.letters]
+        inserts = [left + char + right for left, right in splits for char in self.letters]
+        return set(deletes + transposes + replaces + inserts)
+
+    # Function to read every word into a set. Candidate generation tests hundreds of
+    # thousands of edits, far too many for a binary search of the mapped file each.
+    def get_word_set(self):
+        if self.word_set is None:
+            offsets = struct.unpack_from(f"<{self.word_count + 1}I", self.data, self.offsets_start)
+            blob = self.data[self.words_start:self.words_start + offsets[-1]]
+            self.word_set = frozenset(blob[start:end].decode("utf-8") for start, end in zip(offsets, offsets[1:]))
+        return self.word_set
+
+    # Same rules as SpellChecker.candidates(): the word if known, else known words
+    # one edit away, else two edits away
+    def candidates(self, word):
+        word = word.lower()
+        words = self.get_word_set()
+        if word in words or len(word) > self.longest_word_length + 3:
+            return {word}
+        edits = self.edits1(word)
+        known = edits & words
+        if known:
+            return known
+        return {second for first in edits for second in self.edits1(first) if second in words} or None
+
+# Shared spell service: one dictionary for the whole process. It is loaded once on
+# a background thread at startup and every spell feature goes through it. It is the
+# compiled dictionary when one has been built, otherwise pyspellchecker's SpellChecker.
+spell_checker = None
+spell_ready = threading.Event()
+spell_load_lock = threading.Lock()
+spell_load_seconds = None  # Time taken to load the dictionary
+spell_memory_bytes = None  # Approximate size of the loaded dictionary
+spell_dictionary_version = None  # Hash of the dictionary contents, used to name caches
+spell_longest_word_length = 0
+
+# Function to load the shared spell checker (only the first call does any work)
+def load_spell_service():
+    global spell_checker, spell_load_seconds, spell_memory_bytes, spell_dictionary_version, spell_longest_word_length
+    with spell_load_lock:
+        if spell_ready.is_set():
+            return
+        started = time.perf_counter()
+        if os.path.exists(COMPILED_DICTIONARY_PATH):
+            checker = CompiledDictionary(COMPILED_DICTIONARY_PATH)
+            spell_load_seconds = time.perf_counter() - started
+            spell_memory_bytes = len(checker.data)  # Mapped, only the pages touched are read
+            spell_dictionary_version = checker.version
+            spell_longest_word_length = checker.longest_word_length
+        else:
+            checker = SpellChecker()
+            spell_load_seconds = time.perf_counter() - started
+            dictionary = checker.word_frequency.dictionary
+            spell_memory_bytes = sys.getsizeof(dictionary) + sum(
+                sys.getsizeof(word) + sys.getsizeof(count) for word, count in dictionary.items()
+            )
+            spell_dictionary_version = get_dictionary_version(dictionary.items())
+            spell_longest_word_length = checker.word_frequency.longest_word_length
+        load_personal_dictionary()
+        spell_checker = checker
+        spell_ready.set()
+
+# Function to list every dictionary word, whichever format is loaded
+def get_dictionary_words():
+    checker = get_spell_checker()
+    if isinstance(checker, CompiledDictionary):
+        return list(checker)
+    return list(checker.word_frequency.dictionary)
+
+# Function to start warming up the spell service without blocking the window
+def start_spell_service():
+    threading.Thread(target=load_spell_service, daemon=True).start()
+
+# Function to get the shared spell checker, waiting for the warm-up if needed
+def get_spell_checker():
+    if not spell_ready.is_set():
+        load_spell_service()
+    return spell_checker
+
+# Functions used by every spell feature instead of touching the checker directly
+def spell_is_known(word):
+    if word in personal_words or word in ignored_words:
+        return True
+    return cached_dictionary_lookup(word)
+
+# Candidates come back ranked: exact matches apart from accents first, then by frequency.
+# Worker threads must pass use_symspell, since Tk variables belong to the main thread.
+def spell_candidates(word, use_symspell=None):
+    if use_symspell is None:
+        use_symspell = symspell_var.get()
+    return cached_candidates_lookup(word, use_symspell and symspell_ready.is_set())
+
+# Function to check a word against the loaded dictionary (cached below)
+def dictionary_lookup(word):
+    return word in get_spell_checker()
+
+# Function to work out a word's ranked candidates (cached below)
+def candidates_lookup(word, use_symspell):
+    if use_symspell:
+        candidates = symspell_candidates(word)
+    else:
+        candidates = get_spell_checker().candidates(word)
+    if not candidates:
+        return None
+    checker = get_spell_checker()
+    word_no_accents = remove_diacritics(word)
+    return tuple(sorted(candidates, key=lambda candidate: (remove_diacritics(candidate) != word_no_accents, -checker[candidate], candidate)))
+
+# Verdicts and candidate lists are kept in LRU caches shared by every spell feature,
+# so passes over mostly unchanged text are nearly free. The personal dictionary and
+# ignore list are checked before the cache, so changing them needs no invalidation.
+SPELL_CACHE_SIZE = 50000
+cached_dictionary_lookup = None
+cached_candidates_lookup = None
+
+# Function to (re)create the spell caches with room for maxsize words each
+def configure_spell_cache(maxsize=SPELL_CACHE_SIZE):
+    global cached_dictionary_lookup, cached_candidates_lookup
+    cached_dictionary_lookup = functools.lru_cache(maxsize=maxsize)(dictionary_lookup)
+    cached_candidates_lookup = functools.lru_cache(maxsize=maxsize)(candidates_lookup)
+
+configure_spell_cache()
+
+# Function to describe the caches' size and hit/miss counters
+def get_spell_cache_stats():
+    lines = []
+    for name, cache in (("Word verdicts", cached_dictionary_lookup), ("Candidate lists", cached_candidates_lookup)):
+        info = cache.cache_info()
+        lookups = info.hits + info.misses
+        hit_rate = 100 * info.hits / lookups if lookups else 0
+        lines.append(f"{name}: {info.currsize}/{info.maxsize} entries, {info.hits} hits, {info.misses} misses ({hit_rate:.0f}% hits)")
+    return "\n".join(lines)
+
+# Function to show the cache counters
+def show_spell_cache_stats():
+    messagebox.showinfo("Spell Cache", get_spell_cache_stats())
+
+# Function to ask for a new cache size; the least recently used words are evicted first
+def set_spell_cache_size():
+    maxsize = simpledialog.askinteger("Spell Cache", "Words to keep in each spell cache:",
+                                      initialvalue=cached_dictionary_lookup.cache_info().maxsize, minvalue=1)
+    if maxsize:
+        configure_spell_cache(maxsize)
+
+# Function to empty the caches (the counters start again from zero)
+def clear_spell_cache():
+    cached_dictionary_lookup.cache_clear()
+    cached_candidates_lookup.cache_clear()
+
+# Function to compare words the way pyspellchecker does when it prefers accent fixes
+def remove_diacritics(word):
+    return "".join(char for char in unicodedata.normalize("NFKD", word) if not unicodedata.combining(char))
+
+# Optional suggestion engine: a symmetric-deletion (SymSpell) index. Every dictionary
+# word is stored under each string you can get by deleting up to two of its letters,
+# so a lookup only needs the deletes of the misspelled word instead of generating
+# every edit-distance-2 variant. Entries are (crc32(delete) << 32 | word id) in one
+# sorted array, built once in the background and saved next to the other app data.
+SYMSPELL_MAX_DISTANCE = 2
+SYMSPELL_MAGIC = b"WTSYMSP1"
+symspell_entries = None  # Sorted array('Q') of hash/word-id pairs
+symspell_words = None  # Word id -> word
+symspell_ready = threading.Event()
+symspell_lock = threading.Lock()
+symspell_seconds = None  # Time taken to load or build the index
+
+# Function to list every string made by deleting up to `distance` characters
+def symspell_deletes(word, distance=SYMSPELL_MAX_DISTANCE):
+    deletes = {word}
+    frontier = {word}
+    for _ in range(distance):
+        frontier = {part[:i] + part[i + 1:] for part in frontier for i in range(len(part))}
+        deletes |= frontier
+    return deletes
+
+# Function to build the deletion index from the loaded dictionary
+def build_symspell_index(words):
+    # Bucketing by the top hash byte keeps each sort small and the memory flat
+    buckets = [array.array('Q') for _ in range(256)]
+    for word_id, word in enumerate(words):
+        for delete in symspell_deletes(word):
+            delete_hash = zlib.crc32(delete.encode("utf-8"))
+            buckets[delete_hash >> 24].append((delete_hash << 32) | word_id)
+    entries = array.array('Q')
+    for bucket_id, bucket in enumerate(buckets):
+        entries.extend(sorted(bucket))
+        buckets[bucket_id] = None
+    return entries
+
+# Function to get the file the index for the current dictionary is saved in
+def get_symspell_path():
+    return os.path.join(APP_DATA_DIR, f"symspell-{spell_dictionary_version[:16]}.idx")
+
+# Function to save the index: magic, entry count, word blob size, entries, words
+def save_symspell_index(path, entries, words):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    words_blob = "\n".join(words).encode("utf-8")
+    if sys.byteorder != "little":
+        entries = array.array('Q', entries)
+        entries.byteswap()
+    temp_path = path + ".tmp"
+    with open(temp_path, 'wb') as index_file:
+        index_file.write(SYMSPELL_MAGIC + struct.pack("<QQ", len(entries), len(words_blob)))
+        entries.tofile(index_file)
+        index_file.write(words_blob)
+    os.replace(temp_path, path)
+
+# Function to read a saved index, returning None if it is missing or damaged
+def read_symspell_index(path):
+    try:
+        with open(path, 'rb') as index_file:
+            header = index_file.read(len(SYMSPELL_MAGIC) + 16)
+            if header[:len(SYMSPELL_MAGIC)] != SYMSPELL_MAGIC:
+                return None
+            entry_count, words_size = struct.unpack("<QQ", header[len(SYMSPELL_MAGIC):])
+            entries = array.array('Q')
+            entries.fromfile(index_file, entry_count)
+            words = index_file.read(words_size).decode("utf-8").split("\n")
+    except (OSError, EOFError, struct.error, UnicodeDecodeError):
+        return None
+    if sys.byteorder != "little":
+        entries.byteswap()
+    return entries, words
+
+# Function to load the index from disk, or build and save it (runs once, in the background)
+def load_symspell_index():
+    global symspell_entries, symspell_words, symspell_seconds
+    with symspell_lock:
+        if symspell_ready.is_set():
+            return
+        started = time.perf_counter()
+        checker = get_spell_checker()
+        path = get_symspell_path()
+        index = read_symspell_index(path)
+        if index is None:
+            words = get_dictionary_words()
+            index = (build_symspell_index(words), words)
+            try:
+                save_symspell_index(path, *index)
+            except OSError:
+                pass  # The index still works for this session
+        symspell_entries, symspell_words = index
+        symspell_seconds = time.perf_counter() - started
+        symspell_ready.set()
+
+# Function to measure the Damerau-Levenshtein distance (transpositions count as one edit)
+def damerau_levenshtein(first, second):
+    infinity = len(first) + len(second)
+    last_row_of = {}
+    distances = [[infinity] * (len(second) + 2)]
+    distances += [[infinity] + list(range(len(second) + 1))]
+    distances += [[infinity, i] + [0] * len(second) for i in range(1, len(first) + 1)]
+    for i in range(1, len(first) + 1):
+        last_match_column = 0
+        for j in range(1, len(second) + 1):
+            i1 = last_row_of.get(second[j - 1], 0)
+            j1 = last_match_column
+            cost = 1
+            if first[i - 1] == second[j - 1]:
+                cost = 0
+                last_match_column = j
+            distances[i + 1][j + 1] = min(
+                distances[i][j] + cost,
+                distances[i + 1][j] + 1,
+                distances[i][j + 1] + 1,
+                distances[i1][j1] + (i - i1 - 1) + 1 + (j - j1 - 1),
+            )
+        last_row_of[first[i - 1]] = i
+    return distances[len(first) + 1][len(second) + 1]
+
+# Function to find candidates with the index, matching SpellChecker.candidates():
+# the word itself if known, else all known words at distance 1, else at distance 2
+def symspell_candidates(word):
+    checker = get_spell_checker()
+    if word in checker or len(word) > spell_longest_word_length + 3:
+        return {word}
+    word_ids = set()
+    for delete in symspell_deletes(word):
+        low = zlib.crc32(delete.encode("utf-8")) << 32
+        first = bisect.bisect_left(symspell_entries, low)
+        last = bisect.bisect_left(symspell_entries, low + (1 << 32), first)
+        word_ids.update(symspell_entries[i] & 0xFFFFFFFF for i in range(first, last))
+    by_distance = {1: set(), 2: set()}
+    for word_id in word_ids:
+        candidate = symspell_words[word_id]
+        if abs(len(candidate) - len(word)) > SYMSPELL_MAX_DISTANCE:
+            continue  # Also filters out crc32 collisions cheaply
+        distance = damerau_levenshtein(word, candidate)
+        if distance in by_distance:
+            by_distance[distance].add(candidate)
+    return by_distance[1] or by_distance[2] or None
+
+# Function to switch the SymSpell suggestion engine on or off
+def toggle_symspell():
+    if symspell_var.get() and not symspell_ready.is_set():
+        threading.Thread(target=load_symspell_index, daemon=True).start()
+        update_spell_status()
+
+# Function to show the spell service load time and memory footprint
+def update_spell_status():
+    if spell_ready.is_set():
+        if isinstance(spell_checker, CompiledDictionary):
+            status = f"Dictionary (compiled): {spell_load_seconds:.2f} s, {spell_memory_bytes / (1024 * 1024):.1f} MB mapped"
+            if spell_checker.word_set is not None:
+                status += f", {sys.getsizeof(spell_checker.word_set) / (1024 * 1024):.1f} MB word set"
+        else:
+            status = f"Dictionary: {spell_load_seconds:.2f} s, {spell_memory_bytes / (1024 * 1024):.1f} MB"
+    else:
+        status = "Dictionary: loading..."
+    if symspell_var.get():
+        if symspell_ready.is_set():
+            status += f"\nSuggestion index: {symspell_seconds:.2f} s, {len(symspell_entries) * 8 / (1024 * 1024):.1f} MB"
+        else:
+            status += "\nSuggestion index: building..."
+    spell_status_label.config(text=status)
+    if not spell_ready.is_set() or (symspell_var.get() and not symspell_ready.is_set()):
+        root.after(250, update_spell_status)
+
+current_document_path = None  # File the grid was last loaded from or saved to
+
+# Personal dictionary (all documents) and ignore list (current document only).
+# Both are plain sets checked before the dictionary, so these words are never
+# flagged or sent for candidates.
+PERSONAL_DICTIONARY_PATH = os.path.join(APP_DATA_DIR, "personal_dictionary.txt")
+IGNORE_LISTS_PATH = os.path.join(APP_DATA_DIR, "ignore_lists.json")
+personal_words = set()
+ignored_words = set()
+
+# Function to load the personal dictionary, one word per line
+def load_personal_dictionary():
+    personal_words.clear()
+    try:
+        with open(PERSONAL_DICTIONARY_PATH, 'r', encoding='utf-8') as dictionary_file:
+            personal_words.update(line.strip().lower() for line in dictionary_file if line.strip())
+    except OSError:
+        pass  # Nothing added yet
+
+# Function to add a word to the personal dictionary (appends, so it stays cheap)
+def add_to_personal_dictionary(word):
+    if word in personal_words:
+        return
+    personal_words.add(word)
+    os.makedirs(APP_DATA_DIR, exist_ok=True)
+    with open(PERSONAL_DICTIONARY_PATH, 'a', encoding='utf-8') as dictionary_file:
+        dictionary_file.write(word + "\n")
+
+# Function to read every document's ignore list
+def read_ignore_lists():
+    try:
+        with open(IGNORE_LISTS_PATH, 'r', encoding='utf-8') as ignore_file:
+            return json.load(ignore_file)
+    except (OSError, ValueError):
+        return {}
+
+# Function to switch to the ignore list of the document at path (None for a new grid)
+def load_ignore_list(path):
+    ignored_words.clear()
+    if path is not None:
+        ignored_words.update(read_ignore_lists().get(os.path.abspath(path), []))
+
+# Function to store the current ignore list under the current document
+def save_ignore_list():
+    if current_document_path is None:
+        return  # Kept in memory until the grid is saved
+    ignore_lists = read_ignore_lists()
+    ignore_lists[os.path.abspath(current_document_path)] = sorted(ignored_words)
+    os.makedirs(APP_DATA_DIR, exist_ok=True)
+    with open(IGNORE_LISTS_PATH, 'w', encoding='utf-8') as ignore_file:
+        json.dump(ignore_lists, ignore_file)
+
+# Function to ignore a word everywhere in the current document
+def ignore_word(word):
+    ignored_words.add(word)
+    save_ignore_list()
+
+# Function to accept a word: clear its red marks in place instead of rescanning
+def unflag_word(word):
+    for row, col, text_widget in iter_cells():
+        spans = [(start, end) for start, end, token_word in get_cell_tokens(row, col) if token_word == word]
+        tag_spans(text_widget, 'misspelled', spans, get_cell_line_map(row, col), remove=True)
+        # Viewport highlights work the spans out again before they next grow
+        viewport_state = viewport_highlights.get((row, col), {}).get('misspelled')
+        if viewport_state is not None:
+            viewport_state["version"] = None
+
+# Function to find the word under the mouse in a cell, as (start, end, word) or None
+def get_token_at(row, col, x, y):
+    offset = index_to_offset(get_cell_line_map(row, col), entries[row][col].index(f"@{x},{y}"))
+    tokens = get_cell_tokens(row, col)
+    position = bisect.bisect_right(tokens, offset, key=lambda token: token[0]) - 1
+    if position >= 0 and tokens[position][0] <= offset < tokens[position][1]:
+        return tokens[position]
+    return None
+
+# Function to offer dictionary actions when a cell is right-clicked on an unknown word
+def show_cell_context_menu(event):
+    key = cell_keys.get(str(event.widget))
+    if key is None:
+        return
+    token = get_token_at(key[0], key[1], event.x, event.y)
+    if token is None or spell_is_known(token[2]):
+        return
+    word = token[2]
+
+    def add_word():
+        add_to_personal_dictionary(word)
+        unflag_word(word)
+
+    def ignore_all():
+        ignore_word(word)
+        unflag_word(word)
+
+    context_menu = tk.Menu(root, tearoff=0)
+    context_menu.add_command(label=f"Add '{word}' to Dictionary", command=add_word)
+    context_menu.add_command(label=f"Ignore All '{word}'", command=ignore_all)
+    context_menu.tk_popup(event.x_root, event.y_root)
+
+# Grid documents (version 2): a JSON object with the grid size, document metadata,
+# the Template Maker text and a list of cells, each with its row, column, text and
+# metadata. Version 1 files were a flat {"01": text} object with one digit each for
+# row and column; they are converted when loaded and written as version 2 on save.
+GRID_FORMAT = "writingtool-grid"
+GRID_SCHEMA_VERSION = 2
+GRID_ROWS = 3
+GRID_COLUMNS = 3
+MENU_CELL = (0, 0)  # Holds the buttons instead of text
+DESIGN_CELLS = [(row, col) for row in range(GRID_ROWS) for col in range(GRID_COLUMNS) if (row, col) != MENU_CELL]  # Columns of the Design CSV
+document_metadata = {}  # Metadata of the loaded document, written back on save
+cell_metadata = {}  # (row, col) -> metadata of that cell, written back on save
+document_template = None  # Template Maker text stored with the loaded document
+extra_cells = {}  # (row, col) -> text of loaded cells this window has no box for
+
+# Function to name a cell in journals and messages as "row,col"
+def cell_key(row, col):
+    return f"{row},{col}"
+
+# Function to number a cell for people ("01" to "09"), as in the Design CSV header
+def cell_label(row, col):
+    return f"{row * GRID_COLUMNS + col + 1:02}"
+
+# Function to read a cell name back: "row,col", or the old two-digit "01" form
+def parse_cell_key(key):
+    if "," in key:
+        row, col = key.split(",")
+        return int(row), int(col)
+    if len(key) == 2 and key.isdigit():
+        return int(key[0]), int(key[1])
+    raise ValueError(f"not a cell name: {key!r}")
+
+# Function to check a version 2 document's top-level fields, returning them with
+# defaults filled in. Raises ValueError for a field of the wrong type, so a damaged
+# file is reported like any other unreadable one.
+def read_grid_fields(data):
+    fields = {}
+    for name, default in (("version", GRID_SCHEMA_VERSION), ("rows", GRID_ROWS), ("columns", GRID_COLUMNS)):
+        value = data.get(name, default)
+        if isinstance(value, bool) or not isinstance(value, (int, str)):
+            raise ValueError(f"{name} should be a whole number, not {json.dumps(value)[:20]}")
+        try:
+            fields[name] = int(value)
+        except ValueError:
+            raise ValueError(f"{name} should be a whole number, not {json.dumps(value)[:20]}") from None
+        if fields[name] < 0:
+            raise ValueError(f"{name} should not be negative")
+    if fields["version"] > GRID_SCHEMA_VERSION:
+        raise ValueError(f"this document was saved by a newer version (format {fields['version']})")
+    fields["metadata"] = data.get("metadata") or {}
+    if not isinstance(fields["metadata"], dict):
+        raise ValueError("metadata should be an object")
+    fields["template"] = data.get("template")
+    if fields["template"] is not None and not isinstance(fields["template"], str):
+        raise ValueError("template should be text")
+    return fields
+
+# Function to turn loaded JSON into a grid document, converting version 1 files.
+# Cells that cannot be read are listed under "skipped" instead of being dropped silently.
+def parse_grid_document(data):
+    if not isinstance(data, dict):
+        raise ValueError("not a grid document")
+    if data.get("format") != GRID_FORMAT:
+        # Version 1: {"01": text, ...}
+        cells, skipped = {}, []
+        for key, value in data.items():
+            try:
+                cells[parse_cell_key(key)] = str(value)
+            except ValueError:
+                skipped.append(key)
+        rows = max([GRID_ROWS] + [row + 1 for row, col in cells])
+        columns = max([GRID_COLUMNS] + [col + 1 for row, col in cells])
+        return {"version": 1, "rows": rows, "columns": columns, "metadata": {}, "template": None,
+                "cells": cells, "cell_metadata": {}, "skipped": skipped}
+    fields = read_grid_fields(data)
+    if not isinstance(data.get("cells", []), list):
+        raise ValueError("cells should be a list")
+    cells, metadata, skipped = {}, {}, []
+    for cell in data.get("cells", []):
+        try:
+            position = (int(cell["row"]), int(cell["column"]))
+        except (KeyError, TypeError, ValueError):
+            skipped.append(json.dumps(cell)[:40])
+            continue
+        cells[position] = str(cell.get("text", ""))
+        if cell.get("metadata"):
+            metadata[position] = cell["metadata"]
+    return dict(fields, cells=cells, cell_metadata=metadata, skipped=skipped)
+
+# Function to build a version 2 document from {(row, col): text}
+def build_grid_document(cells, rows=GRID_ROWS, columns=GRID_COLUMNS, metadata=None, template=None, cells_metadata=None):
+    cells_metadata = cells_metadata or {}
+    cell_list = []
+    for (row, col), text in sorted(cells.items()):
+        cell = {"row": row, "column": col, "text": text}
+        if cells_metadata.get((row, col)):
+            cell["metadata"] = cells_metadata[(row, col)]
+        cell_list.append(cell)
+    return {"format": GRID_FORMAT, "version": GRID_SCHEMA_VERSION, "rows": rows, "columns": columns,
+            "metadata": metadata or {}, "template": template, "cells": cell_list}
+
+# Compressed grid files (.wtgrid): the magic bytes, the length of a JSON header, the
+# header, then zlib-compressed pieces of cell text. The header is the version 2
+# document without the cell text, and lists where the pieces of each cell are, so
+# opening a file reads only the header and pieces are decompressed when needed.
+GRID_CONTAINER_MAGIC = b"WTGRID01"
+GRID_CONTAINER_CHUNK_CHARS = 64 * 1024  # Text per compressed piece
+
+# Function to write a version 2 document as a compressed grid file
+def write_grid_container(path, document):
+    pieces, cells, offset = [], [], 0
+    for cell in document["cells"]:
+        text = cell["text"]
+        chunks = []
+        for start in range(0, len(text), GRID_CONTAINER_CHUNK_CHARS):
+            piece = zlib.compress(text[start:start + GRID_CONTAINER_CHUNK_CHARS].encode('utf-8'))
+            chunks.append([offset, len(piece)])
+            pieces.append(piece)
+            offset += len(piece)
+        entry = {key: value for key, value in cell.items() if key != "text"}
+        entry["chunks"] = chunks
+        cells.append(entry)
+    header = json.dumps(dict(document, cells=cells)).encode('utf-8')
+    write_file_atomic(path, GRID_CONTAINER_MAGIC + struct.pack("<I", len(header)) + header + b"".join(pieces))
+
+# Function to check whether a file is a compressed grid file
+def is_grid_container(path):
+    with open(path, 'rb') as grid_file:
+        return grid_file.read(len(GRID_CONTAINER_MAGIC)) == GRID_CONTAINER_MAGIC
+
+# Class for reading a compressed grid file: the header is read when it is opened,
+# cell text one piece at a time
+class GridContainer:
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        try:
+            if self.file.read(len(GRID_CONTAINER_MAGIC)) != GRID_CONTAINER_MAGIC:
+                raise ValueError("not a compressed grid file")
+            (header_length,) = struct.unpack("<I", self.file.read(4))
+            self.header = json.loads(self.file.read(header_length).decode('utf-8'))
+        except (struct.error, UnicodeDecodeError) as error:
+            self.file.close()
+            raise ValueError(f"damaged compressed grid file: {error}")
+        except ValueError:
+            self.file.close()
+            raise
+        self.data_start = len(GRID_CONTAINER_MAGIC) + 4 + header_length
+        try:
+            if not isinstance(self.header, dict) or not isinstance(self.header.get("cells", []), list):
+                raise ValueError("damaged compressed grid file: the header is not a grid document")
+            # The document without cell text, to take the sizes and metadata from
+            self.document = parse_grid_document(dict(self.header, cells=[dict(cell, text="") if isinstance(cell, dict) else cell
+                                                                         for cell in self.header.get("cells", [])]))
+        except ValueError:
+            self.file.close()
+            raise
+        self.chunks = {}
+        for cell in self.header.get("cells", []):
+            try:
+                self.chunks[(int(cell["row"]), int(cell["column"]))] = cell.get("chunks", [])
+            except (KeyError, TypeError, ValueError):
+                pass  # Listed in document["skipped"]
+
+    # Function to decompress one piece of a cell
+    def read_chunk(self, position, index):
+        offset, length = self.chunks[position][index]
+        self.file.seek(self.data_start + offset)
+        try:
+            return zlib.decompress(self.file.read(length)).decode('utf-8')
+        except (zlib.error, UnicodeDecodeError) as error:
+            raise ValueError(f"damaged text in cell {cell_key(*position)}: {error}")
+
+    # Function to read a whole cell
+    def read_cell(self, position):
+        return "".join(self.read_chunk(position, index) for index in range(len(self.chunks.get(position, []))))
+
+    # Function to read the whole document, as parse_grid_document gives it
+    def read_document(self):
+        return dict(self.document, cells={position: self.read_cell(position) for position in self.chunks})
+
+    def close(self):
+        self.file.close()
+
+# Function to read any grid document file, compressed or JSON, in full
+def read_grid_file(path):
+    if is_grid_container(path):
+        container = GridContainer(path)
+        try:
+            return container.read_document()
+        finally:
+            container.close()
+    with open(path, 'r', encoding='utf-8') as json_file:
+        return parse_grid_document(json.load(json_file))
+
+# Function to get the Template Maker text to store with the document
+def get_template_text():
+    if 'text_field' in globals() and text_field.winfo_exists():
+        return text_field.get("1.0", tk.END).strip() or None
+    return document_template
+
+# Function to put loaded text into the grid with one replace per changed cell and
+# then process all of them together; cells that already hold the text are skipped
+def populate_cells(cells):
+    for (row, col), text in cells.items():
+        if 0 <= row < GRID_ROWS and 0 <= col < GRID_COLUMNS and entries[row][col] is not None:
+            if get_cell_text(row, col) != text:
+                entries[row][col].replace("1.0", "end-1c", text)
+    for row, col, text_widget in iter_cells():
+        refresh_cell_text(row, col, origin="load")
+        text_widget.edit_reset()  # Undo should not bring back the previous document
+
 # Function to export data to JSON file
 def export_json():
-    data = {}
-    for row in range(3):
-        for col in range(3):
-            if entries[row][col] is not None:
-                cell_data = entries[row][col].get("1.0", tk.END).strip()
-                data[f"{row}{col}"] = cell_data
-    file_path = filedialog.asksaveasfilename(defaultextension='.json', filetypes=[("JSON files", "*.json")])
+    global current_document_path, journal_path
+    if stream_load is not None:
+        # The cells hold a mix of the old and the incoming text until the load ends
+        messagebox.showinfo("Save", f"Wait until {os.path.basename(stream_load['path'])} has finished loading.")
+        return
+    cells = dict(extra_cells)
+    for row, col, text_widget in iter_cells():
+        cells[(row, col)] = text_widget.get("1.0", tk.END).strip()
+    file_path = filedialog.asksaveasfilename(defaultextension='.json', filetypes=[("JSON files", "*.json"), ("Compressed grid files", "*.wtgrid")])
     if file_path:
-        with open(file_path, 'w') as json_file:
-            json.dump(data, json_file)
+        metadata = dict(document_metadata, saved=time.strftime("%Y-%m-%dT%H:%M:%S"))
+        rows = max([GRID_ROWS] + [row + 1 for row, col in cells])
+        columns = max([GRID_COLUMNS] + [col + 1 for row, col in cells])
+        document = build_grid_document(cells, rows, columns, metadata, get_template_text(), cell_metadata)
+        if file_path.endswith(".wtgrid"):
+            write_grid_container(file_path, document)
+        else:
+            with open(file_path, 'w') as json_file:
+                json.dump(document, json_file)
+        current_document_path = file_path
+        save_ignore_list()
+        if library_var.get():
+            store_document_in_library(file_path, parse_grid_document(document))
+        record_snapshot(file_path, document)
+        # Start the document's journal from what was just saved
+        journal_path = None
+        if autosave_var.get():
+            queue_autosave()
 
 # Function to export data to CSV file
 import csv  # Add this line to your imports at the top
@@ -30,8 +792,8 @@ def export_csv():
     row_data = []
 
     # Collect data from each text field in the order to be saved as a single row
-    for row in range(3):  # Adjust range as per your grid layout
-        for col in range(3):  # Adjust range as per your grid layout
+    for row in range(GRID_ROWS):
+        for col in range(GRID_COLUMNS):
             if entries[row][col] is not None:
                 # Get text from the entry field and strip any excess whitespace
                 cell_data = entries[row][col].get("1.0", tk.END).strip()
@@ -51,52 +813,1469 @@ def export_csv():
 
 # Function to import data from JSON file
 def import_json():
-    file_path = filedialog.askopenfilename(filetypes=[("JSON files", "*.json")])
+    file_path = filedialog.askopenfilename(filetypes=[("Grid documents", "*.json *.wtgrid"), ("JSON files", "*.json"), ("Compressed grid files", "*.wtgrid")])
     if file_path:
-        with open(file_path, 'r') as json_file:
-            data = json.load(json_file)
-            for key, value in data.items():
+        open_document_file(file_path)
+
+# Function to read a grid document file and show it in the grid; compressed files
+# and big JSON files are loaded a piece at a time
+def open_document_file(file_path):
+    try:
+        if is_grid_container(file_path):
+            start_container_load(file_path)
+            return
+        if os.path.getsize(file_path) >= STREAM_LOAD_BYTES:
+            start_stream_load(file_path)
+            return
+        with open(file_path, 'r', encoding='utf-8') as json_file:
+            document = parse_grid_document(json.load(json_file))
+    except (OSError, ValueError) as error:
+        messagebox.showerror("Load", f"Could not load {os.path.basename(file_path)}: {error}")
+        return
+    finish_document_load(document, file_path)
+
+# Function to show a loaded document, offering the autosaved changes from its journal
+def finish_document_load(document, file_path):
+    # The autosave journal may hold edits made after the file was last saved
+    journal_file_path = get_document_journal_path(file_path)
+    journal = read_journal(journal_file_path)
+    if journal and os.path.getmtime(journal_file_path) >= os.path.getmtime(file_path):
+        journal_cells = {parse_cell_key(key): text for key, text in journal.items()}
+        if (any(text.strip() != document["cells"].get(position, "").strip() for position, text in journal_cells.items())
+                and messagebox.askyesno("Load", "This file has autosaved changes that were never saved. Restore them?")):
+            document["cells"] = {**document["cells"], **journal_cells}
+    show_document(document, file_path)
+    if library_var.get():
+        store_document_in_library(file_path, document)
+
+# Function to show a parsed grid document in the grid
+def show_document(document, file_path):
+    global current_document_path, document_metadata, document_template
+    cancel_stream_load()  # Otherwise a big load still running would write over this one
+    cells = document["cells"]
+    current_document_path = file_path
+    document_metadata = document["metadata"]
+    document_template = document["template"]
+    cell_metadata.clear()
+    cell_metadata.update(document["cell_metadata"])
+    extra_cells.clear()
+    extra_cells.update({position: text for position, text in cells.items()
+                        if not (0 <= position[0] < GRID_ROWS and 0 <= position[1] < GRID_COLUMNS)
+                        or entries[position[0]][position[1]] is None})
+    load_ignore_list(file_path)
+    populate_cells(cells)
+    if document["template"] and 'text_field' in globals() and text_field.winfo_exists():
+        text_field.delete("1.0", tk.END)
+        text_field.insert("1.0", document["template"])
+    if document["skipped"] or extra_cells:
+        messagebox.showwarning("Load", f"{len(extra_cells)} cells do not fit this grid and {len(document['skipped'])} could not be read "
+                                       f"({', '.join(document['skipped'][:5])}). Cells that do not fit are kept and saved again.")
+    # Unchanged cells get their highlights back from the spell result cache
+    if highlight_errors or live_spell_var.get():
+        spell_check_highlight()
+
+# Streaming load for big files: a reader thread decodes the document one top-level
+# value (and one cell) at a time and queues the cells, while the window inserts
+# their text in chunks between events. Cells fill in order and each becomes
+# editable as soon as its text is in; the others stay read-only until then.
+STREAM_LOAD_BYTES = 1024 * 1024  # Files at least this big are streamed
+STREAM_CHUNK_CHARS = 64 * 1024  # Text inserted into a cell per event-loop turn
+stream_load = None  # State of the streaming load in progress
+loading_cells = set()  # (row, col) of cells whose text is still arriving
+
+# Function to decode a grid document file piece by piece, putting ("cell", (row, col),
+# text, metadata, progress), ("field", name, value, progress), ("skipped", key),
+# ("error", message) and finally ("done",) on a queue
+def read_document_stream(file_path, items, cancelled):
+    try:
+        with open(file_path, 'r', encoding='utf-8') as json_file:
+            data = json_file.read()
+        decoder = json.JSONDecoder()
+        whitespace = re.compile(r"\s*")
+
+        # Function to skip whitespace and one expected character
+        def expect(position, chars):
+            position = whitespace.match(data, position).end()
+            if position >= len(data) or data[position] not in chars:
+                raise ValueError(f"expected {chars!r} at character {position}")
+            return position + 1
+
+        position = expect(0, "{")
+        if data[whitespace.match(data, position).end()] == "}":
+            position = len(data)  # Empty document
+        while position < len(data) and not cancelled.is_set():
+            key, position = decoder.raw_decode(data, whitespace.match(data, position).end())
+            position = expect(position, ":")
+            if key == "cells":
+                # Version 2: a list of cell objects, decoded one at a time
+                position = expect(position, "[")
+                if data[whitespace.match(data, position).end()] == "]":
+                    position = expect(position, "]")
+                else:
+                    while not cancelled.is_set():
+                        cell, position = decoder.raw_decode(data, whitespace.match(data, position).end())
+                        try:
+                            items.put(("cell", (int(cell["row"]), int(cell["column"])), str(cell.get("text", "")), cell.get("metadata"), position / len(data)))
+                        except (KeyError, TypeError, ValueError):
+                            items.put(("skipped", json.dumps(cell)[:40]))
+                        position = whitespace.match(data, position).end()
+                        if data[position] == "]":
+                            position += 1
+                            break
+                        position = expect(position, ",")
+            else:
+                value, position = decoder.raw_decode(data, whitespace.match(data, position).end())
+                if key in ("format", "version", "rows", "columns", "metadata", "template"):
+                    items.put(("field", key, value, position / len(data)))
+                else:
+                    # Version 1: every key names a cell
+                    try:
+                        items.put(("cell", parse_cell_key(key), str(value), None, position / len(data)))
+                    except ValueError:
+                        items.put(("skipped", key))
+            position = whitespace.match(data, position).end()
+            if data[position] == "}":
+                break
+            position = expect(position, ",")
+        items.put(("done",))
+    except (OSError, ValueError, IndexError, UnicodeDecodeError) as error:
+        items.put(("error", str(error) or "the file ended too soon"))
+
+# Function to start streaming a big document into the grid
+def start_stream_load(file_path):
+    global stream_load
+    cancel_stream_load()
+    state = {"path": file_path, "items": queue.Queue(), "cancelled": threading.Event(), "current": None, "progress": 0.0,
+             "document": {"version": GRID_SCHEMA_VERSION, "rows": GRID_ROWS, "columns": GRID_COLUMNS, "metadata": {},
+                          "template": None, "cells": {}, "cell_metadata": {}, "skipped": []}}
+    stream_load = state
+    for row, col, text_widget in iter_cells():
+        refresh_cell_text(row, col)
+        loading_cells.add((row, col))
+        viewport_highlights.pop((row, col), None)  # Its spans are for text that is being replaced
+        text_widget.config(state=tk.DISABLED)
+    threading.Thread(target=read_document_stream, args=(file_path, state["items"], state["cancelled"]), daemon=True).start()
+    root.after(1, pump_stream_load, state)
+
+# Function to stop a load that is still running, keeping the text that arrived
+def cancel_stream_load():
+    global stream_load
+    if stream_load is not None:
+        stream_load["cancelled"].set()
+        finish_stream_cells(stream_load)
+        stream_load = None
+
+# Function to make every cell editable again and process the text that arrived
+def finish_stream_cells(state):
+    if "container" in state:
+        state["container"].close()
+    for row, col, text_widget in iter_cells():
+        text_widget.config(state=tk.NORMAL)
+    loading_cells.clear()
+    for row, col, text_widget in iter_cells():
+        refresh_cell_text(row, col, origin="load")
+        text_widget.edit_reset()  # Drops the loaded text the chunked inserts put on the undo stack
+    load_status_label.config(text="")
+
+# Function to take the loaded cells the grid shows from the widgets once the load
+# has finished, so edits made to cells that were ready early are not loaded over
+def keep_loaded_cell_edits(document, positions):
+    for row, col, text_widget in iter_cells():
+        if (row, col) in positions:
+            document["cells"][(row, col)] = cell_texts[(row, col)]
+
+# Function to move a streaming load along for a few milliseconds, then yield to the window
+def pump_stream_load(state):
+    global stream_load
+    if state is not stream_load:
+        return  # A newer load took over
+    document = state["document"]
+    deadline = time.perf_counter() + 0.02
+    while time.perf_counter() < deadline:
+        if state["current"] is not None:
+            row, col, text, offset = state["current"]
+            text_widget = entries[row][col]
+            text_widget.config(state=tk.NORMAL)
+            text_widget.insert("end-1c", text[offset:offset + STREAM_CHUNK_CHARS])
+            offset += STREAM_CHUNK_CHARS
+            if offset < len(text):
+                text_widget.config(state=tk.DISABLED)
+                state["current"] = (row, col, text, offset)
+            else:
+                # This cell is complete and can be read and edited now
+                loading_cells.discard((row, col))
+                refresh_cell_text(row, col, origin="load")
+                state["current"] = None
+            continue
+        try:
+            item = state["items"].get_nowait()
+        except queue.Empty:
+            break
+        if item[0] == "cell":
+            kind, (row, col), text, metadata, state["progress"] = item
+            document["cells"][(row, col)] = text
+            if metadata:
+                document["cell_metadata"][(row, col)] = metadata
+            if (row, col) in loading_cells:
+                text_widget = entries[row][col]
+                text_widget.config(state=tk.NORMAL)
+                text_widget.delete("1.0", tk.END)
+                text_widget.config(state=tk.DISABLED)
+                state["current"] = (row, col, text, 0)
+        elif item[0] == "field":
+            kind, name, value, state["progress"] = item
+            document[name] = value
+        elif item[0] == "skipped":
+            document["skipped"].append(item[1])
+        else:
+            stream_load = None
+            finish_stream_cells(state)
+            if item[0] == "error":
+                messagebox.showerror("Load", f"Could not load {os.path.basename(state['path'])}: {item[1]}")
+            elif document.get("format", GRID_FORMAT) != GRID_FORMAT:
+                messagebox.showerror("Load", f"{os.path.basename(state['path'])} is not a grid document this version can read")
+            else:
                 try:
-                    row, col = int(key[0]), int(key[1])
-                    if entries[row][col] is not None:
-                        entries[row][col].delete("1.0", tk.END)
-                        entries[row][col].insert("1.0", value)
-                except (IndexError, ValueError):
-                    pass  # Handle any improperly formatted keys gracefully
+                    document.update(read_grid_fields(document))
+                except ValueError as error:
+                    messagebox.showerror("Load", f"Could not load {os.path.basename(state['path'])}: {error}")
+                    return
+                keep_loaded_cell_edits(document, document["cells"])
+                finish_document_load(document, state["path"])
+            return
+    loaded = len(document["cells"]) - (0 if state["current"] is None else 1)
+    load_status_label.config(text=f"Loading {os.path.basename(state['path'])}: {state['progress'] * 100:.0f}% ({loaded} cells ready)")
+    root.after(1, pump_stream_load, state)
+
+# Function to open a compressed grid file: the first piece of every cell is shown
+# straight away, the rest is decompressed and added a piece per event-loop turn
+def start_container_load(file_path):
+    global stream_load
+    cancel_stream_load()
+    container = GridContainer(file_path)
+    document = dict(container.document, cells={})
+    state = {"path": file_path, "container": container, "cancelled": threading.Event(), "document": document, "pending": collections.deque()}
+    stream_load = state
+    try:
+        for row, col, text_widget in iter_cells():
+            refresh_cell_text(row, col)
+            if (row, col) not in container.chunks:
+                continue
+            chunk_count = len(container.chunks[(row, col)])
+            text_widget.delete("1.0", tk.END)
+            if chunk_count:
+                text_widget.insert("1.0", container.read_chunk((row, col), 0))
+            if chunk_count > 1:
+                loading_cells.add((row, col))
+                viewport_highlights.pop((row, col), None)  # Its spans are for text that is being replaced
+                text_widget.config(state=tk.DISABLED)
+                state["pending"].extend(((row, col), index) for index in range(1, chunk_count))
+            else:
+                refresh_cell_text(row, col, origin="load")
+    except (OSError, ValueError):
+        cancel_stream_load()
+        raise
+    root.after(1, pump_container_load, state)
+
+# Function to add the next pieces of a compressed grid file for a few milliseconds
+def pump_container_load(state):
+    global stream_load
+    if state is not stream_load:
+        return  # A newer load took over
+    container, pending = state["container"], state["pending"]
+    deadline = time.perf_counter() + 0.02
+    try:
+        while pending and time.perf_counter() < deadline:
+            (row, col), index = pending.popleft()
+            text_widget = entries[row][col]
+            text_widget.config(state=tk.NORMAL)
+            text_widget.insert("end-1c", container.read_chunk((row, col), index))
+            if index + 1 < len(container.chunks[(row, col)]):
+                text_widget.config(state=tk.DISABLED)
+            else:
+                loading_cells.discard((row, col))
+                refresh_cell_text(row, col, origin="load")
+        if pending:
+            load_status_label.config(text=f"Loading {os.path.basename(state['path'])}: {len(pending)} pieces left")
+            root.after(1, pump_container_load, state)
+            return
+        document = state["document"]
+        for (row, col) in container.chunks:
+            if not (0 <= row < GRID_ROWS and 0 <= col < GRID_COLUMNS and entries[row][col] is not None):
+                document["cells"][(row, col)] = container.read_cell((row, col))
+    except (OSError, ValueError) as error:
+        cancel_stream_load()
+        messagebox.showerror("Load", f"Could not load {os.path.basename(state['path'])}: {error}")
+        return
+    stream_load = None
+    finish_stream_cells(state)
+    # Cells in the grid are taken from it once pending edits have been processed
+    keep_loaded_cell_edits(document, container.chunks)
+    finish_document_load(document, state["path"])
+
+# Loads into other Text widgets (the Template Maker) keep one pending after() job
+# per widget, so a new load can cancel the old one before clearing the widget
+widget_load_jobs = {}  # str(widget) -> after() id
+
+# Function to cancel a load still running into a widget
+def cancel_widget_load(text_widget):
+    job = widget_load_jobs.pop(str(text_widget), None)
+    if job is not None:
+        root.after_cancel(job)
+
+# Function to insert long text into a Text widget a chunk per event-loop turn,
+# showing how far it got in a label
+def insert_in_chunks(text_widget, text, status_label, offset=0):
+    widget_load_jobs.pop(str(text_widget), None)
+    if not text_widget.winfo_exists():
+        return
+    text_widget.insert("end-1c", text[offset:offset + STREAM_CHUNK_CHARS])
+    offset += STREAM_CHUNK_CHARS
+    if offset < len(text):
+        status_label.config(text=f"Loading template: {offset * 100 // len(text)}%")
+        widget_load_jobs[str(text_widget)] = root.after(1, insert_in_chunks, text_widget, text, status_label, offset)
+    else:
+        status_label.config(text="")
+
+# Function to read the template out of a file on a background thread (the same
+# reader as streamed grid files), then insert it in chunks
+def start_template_load(text_widget, file_path, status_label):
+    cancel_widget_load(text_widget)
+    items = queue.Queue()
+    threading.Thread(target=read_document_stream, args=(file_path, items, threading.Event()), daemon=True).start()
+    status_label.config(text=f"Reading {os.path.basename(file_path)}...")
+    widget_load_jobs[str(text_widget)] = root.after(1, pump_template_load, text_widget, file_path, items, status_label)
+
+# Function to check on the template reader without blocking the window
+def pump_template_load(text_widget, file_path, items, status_label):
+    widget_load_jobs.pop(str(text_widget), None)
+    if not text_widget.winfo_exists():
+        return
+    while True:
+        try:
+            item = items.get_nowait()
+        except queue.Empty:
+            widget_load_jobs[str(text_widget)] = root.after(20, pump_template_load, text_widget, file_path, items, status_label)
+            return
+        if item[0] == "field" and item[1] == "template" and isinstance(item[2], str):
+            text_widget.delete("1.0", tk.END)
+            insert_in_chunks(text_widget, item[2], status_label)
+            return
+        if item[0] == "error":
+            status_label.config(text="")
+            messagebox.showerror("Load Template", f"Could not load {os.path.basename(file_path)}: {item[1]}")
+            return
+        if item[0] == "done":
+            status_label.config(text=f"{os.path.basename(file_path)} has no template")
+            return
+
+# Document library: an optional SQLite database in the app folder with one row per
+# saved or opened document and one per cell, plus an FTS5 full-text index over the
+# cell text that triggers keep in step. The database runs in WAL mode so a search
+# never waits for a save. It backs Open Recent, searching every document at once
+# and reading a single cell without opening its file.
+LIBRARY_PATH = os.path.join(APP_DATA_DIR, "library.db")
+LIBRARY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    title TEXT,
+    rows INTEGER,
+    columns INTEGER,
+    metadata TEXT,
+    template TEXT,
+    modified REAL,
+    opened REAL
+);
+CREATE TABLE IF NOT EXISTS cells (
+    id INTEGER PRIMARY KEY,
+    document_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    row INTEGER NOT NULL,
+    column INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    metadata TEXT,
+    UNIQUE (document_id, row, column)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS cells_fts USING fts5(text, content='cells', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS cells_insert AFTER INSERT ON cells BEGIN
+    INSERT INTO cells_fts(rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS cells_delete AFTER DELETE ON cells BEGIN
+    INSERT INTO cells_fts(cells_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS cells_update AFTER UPDATE OF text ON cells BEGIN
+    INSERT INTO cells_fts(cells_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    INSERT INTO cells_fts(rowid, text) VALUES (new.id, new.text);
+END;
+"""
+library_connection = None
+
+# Function to open the library database, creating it the first time
+def get_library():
+    global library_connection
+    if library_connection is None:
+        os.makedirs(APP_DATA_DIR, exist_ok=True)
+        library_connection = sqlite3.connect(LIBRARY_PATH)
+        library_connection.execute("PRAGMA journal_mode=WAL")
+        library_connection.execute("PRAGMA synchronous=NORMAL")
+        library_connection.execute("PRAGMA foreign_keys=ON")
+        library_connection.executescript(LIBRARY_SCHEMA)
+    return library_connection
+
+# Function to add or update a parsed grid document in the library, in one transaction
+def store_document(file_path, document, opened=True):
+    file_path = os.path.abspath(file_path)
+    try:
+        modified = os.path.getmtime(file_path)
+    except OSError:
+        modified = time.time()
+    connection = get_library()
+    with connection:
+        connection.execute(
+            "INSERT INTO documents (path, title, rows, columns, metadata, template, modified, opened) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(path) DO UPDATE SET title = excluded.title, rows = excluded.rows, columns = excluded.columns, "
+            "metadata = excluded.metadata, template = excluded.template, modified = excluded.modified, "
+            "opened = COALESCE(excluded.opened, documents.opened)",
+            (file_path, os.path.splitext(os.path.basename(file_path))[0], document["rows"], document["columns"],
+             json.dumps(document["metadata"]), document["template"], modified, time.time() if opened else None))
+        document_id = connection.execute("SELECT id FROM documents WHERE path = ?", (file_path,)).fetchone()[0]
+        old_cells = dict(((row, col), (text, metadata)) for row, col, text, metadata in
+                         connection.execute("SELECT row, column, text, metadata FROM cells WHERE document_id = ?", (document_id,)))
+        new_cells = {(row, col): (text, json.dumps(document["cell_metadata"][(row, col)]) if document["cell_metadata"].get((row, col)) else None)
+                     for (row, col), text in document["cells"].items()}
+        # Only cells whose text or metadata changed are rewritten, and only a change
+        # of text touches their index entries (the update trigger watches text alone)
+        connection.executemany("DELETE FROM cells WHERE document_id = ? AND row = ? AND column = ?",
+                               [(document_id, row, col) for row, col in old_cells if (row, col) not in new_cells])
+        connection.executemany(
+            "INSERT INTO cells (document_id, row, column, text, metadata) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(document_id, row, column) DO UPDATE SET text = excluded.text, metadata = excluded.metadata",
+            [(document_id, row, col, text, metadata) for (row, col), (text, metadata) in new_cells.items()
+             if old_cells.get((row, col)) != (text, metadata)])
+    return document_id
+
+# Function to store a document the window saved or opened. The library is optional,
+# so a database error (locked by another instance, no FTS5) is shown in the status
+# area instead of stopping the save or load.
+def store_document_in_library(file_path, document):
+    try:
+        store_document(file_path, document)
+    except sqlite3.Error as error:
+        load_status_label.config(text=f"Library not updated: {error}")
+
+# Function to list recently opened documents as (id, path, title), newest first
+def get_recent_documents(limit=10):
+    return get_library().execute(
+        "SELECT id, path, title FROM documents WHERE opened IS NOT NULL ORDER BY opened DESC LIMIT ?", (limit,)).fetchall()
+
+# Function to turn typed words into an FTS5 query that matches cells containing all
+# of them (each word quoted, so punctuation is never read as query syntax; the
+# last word also matches as a prefix so results show up while typing)
+def make_library_query(text):
+    terms = ['"' + word.replace('"', '""') + '"' for word in text.split()]
+    if not terms:
+        return None
+    terms[-1] += "*"
+    return " ".join(terms)
+
+# Function to search every cell in the library; returns (document id, path, title,
+# row, column, snippet) for the best matches
+def search_library(text, limit=200):
+    query = make_library_query(text)
+    if query is None:
+        return []
+    return get_library().execute(
+        "SELECT documents.id, documents.path, documents.title, cells.row, cells.column, "
+        "snippet(cells_fts, 0, '[', ']', '...', 12) "
+        "FROM cells_fts JOIN cells ON cells.id = cells_fts.rowid JOIN documents ON documents.id = cells.document_id "
+        "WHERE cells_fts MATCH ? ORDER BY rank LIMIT ?", (query, limit)).fetchall()
+
+# Function to read one cell of a stored document without loading the rest
+def load_library_cell(document_id, row, col):
+    found = get_library().execute(
+        "SELECT text FROM cells WHERE document_id = ? AND row = ? AND column = ?", (document_id, row, col)).fetchone()
+    return found[0] if found else None
+
+# Function to rebuild a parsed grid document from the library
+def load_library_document(document_id):
+    connection = get_library()
+    rows, columns, metadata, template = connection.execute(
+        "SELECT rows, columns, metadata, template FROM documents WHERE id = ?", (document_id,)).fetchone()
+    cells, cells_metadata = {}, {}
+    for row, col, text, cell_meta in connection.execute(
+            "SELECT row, column, text, metadata FROM cells WHERE document_id = ?", (document_id,)):
+        cells[(row, col)] = text
+        if cell_meta:
+            cells_metadata[(row, col)] = json.loads(cell_meta)
+    return {"version": GRID_SCHEMA_VERSION, "rows": rows, "columns": columns, "metadata": json.loads(metadata or "{}"),
+            "template": template, "cells": cells, "cell_metadata": cells_metadata, "skipped": []}
+
+# Function to open a library document from its file, or from the library copy if the file is gone
+def open_library_document(document_id, file_path):
+    if os.path.exists(file_path):
+        open_document_file(file_path)
+    else:
+        show_document(load_library_document(document_id), file_path)
+        get_library().execute("UPDATE documents SET opened = ? WHERE id = ?", (time.time(), document_id))
+        get_library().commit()
+
+# Function to fill the Open Recent menu each time it is shown
+def fill_recent_menu():
+    recent_menu.delete(0, tk.END)
+    recent = get_recent_documents()
+    for document_id, file_path, title in recent:
+        recent_menu.add_command(label=f"{title}  ({os.path.dirname(file_path)})",
+                                command=lambda document_id=document_id, file_path=file_path: open_library_document(document_id, file_path))
+    if not recent:
+        recent_menu.add_command(label="(no documents yet)", state=tk.DISABLED)
+
+# Function to add every grid document in a folder (and its subfolders) to the library
+def add_folder_to_library():
+    folder = filedialog.askdirectory()
+    if not folder:
+        return
+    started = time.perf_counter()
+    added, failed, database_errors, last_error = 0, 0, 0, None
+    for file_path in iter_document_paths([folder]):
+        try:
+            store_document(file_path, read_grid_file(file_path), opened=False)
+            added += 1
+        except (OSError, ValueError, UnicodeDecodeError):
+            failed += 1  # Not a grid document
+        except sqlite3.Error as error:
+            database_errors += 1  # For example locked by another instance; go on with the rest
+            last_error = error
+    status = (f"Added {added} documents in {time.perf_counter() - started:.1f} s"
+              + (f" ({failed} files were not grid documents)" if failed else ""))
+    if database_errors:
+        status += f"; {database_errors} could not be stored: {last_error}"
+    messagebox.showinfo("Library", status)
+
+# Function to open the library search window: matches show as you type, selecting
+# one previews its cell (read on its own), double-clicking opens its document
+def open_library_search():
+    window = tk.Toplevel(root)
+    window.title("Search Library")
+    window.geometry("700x600")
+    query_var = tk.StringVar()
+    query_entry = tk.Entry(window, textvariable=query_var, font=("TkDefaultFont", 14))
+    query_entry.pack(side=tk.TOP, fill=tk.X, padx=10, pady=10)
+    status_label = tk.Label(window, text="", font=("TkDefaultFont", 10), anchor="w")
+    status_label.pack(side=tk.TOP, fill=tk.X, padx=10)
+    tree = ttk.Treeview(window, columns=("cell", "snippet"), selectmode="browse", height=12)
+    tree.heading("#0", text="Document")
+    tree.heading("cell", text="Cell")
+    tree.heading("snippet", text="Match")
+    tree.column("#0", width=150)
+    tree.column("cell", width=50, anchor="center")
+    tree.column("snippet", width=450)
+    tree.pack(side=tk.TOP, fill=tk.BOTH, expand=True, padx=10)
+    preview = tk.Text(window, wrap='word', height=10, font=("TkDefaultFont", 12))
+    preview.pack(side=tk.TOP, fill=tk.BOTH, padx=10, pady=10)
+    results = {}
+    search_job = [None]
+
+    # Function to run the search and list the matches
+    def run_search():
+        search_job[0] = None
+        started = time.perf_counter()
+        try:
+            found = search_library(query_var.get())
+        except sqlite3.OperationalError as error:
+            status_label.config(text=f"Search failed: {error}")
+            return
+        tree.delete(*tree.get_children())
+        results.clear()
+        for document_id, file_path, title, row, col, snippet in found:
+            item = tree.insert("", tk.END, text=title, values=(f"{row * GRID_COLUMNS + col + 1:02}", snippet.replace("\n", " ")))
+            results[item] = (document_id, file_path, row, col)
+        status_label.config(text=f"{len(found)} matches in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    # Function to search a moment after typing stops
+    def on_query_changed(*args):
+        if search_job[0] is not None:
+            window.after_cancel(search_job[0])
+        search_job[0] = window.after(SEARCH_DEBOUNCE_MS, run_search)
+
+    # Function to show the selected cell in the preview
+    def show_preview(event=None):
+        selection = tree.selection()
+        if selection:
+            document_id, file_path, row, col = results[selection[0]]
+            preview.delete("1.0", tk.END)
+            preview.insert("1.0", load_library_cell(document_id, row, col) or "")
+
+    # Function to open the selected document in the grid
+    def open_selected(event=None):
+        selection = tree.selection()
+        if selection:
+            document_id, file_path, row, col = results[selection[0]]
+            open_library_document(document_id, file_path)
+
+    query_var.trace_add("write", on_query_changed)
+    tree.bind("<<TreeviewSelect>>", show_preview)
+    tree.bind("<Double-1>", open_selected)
+    query_entry.focus_set()
+
+
+# Version history: every save also records a snapshot in the app folder. Cell text
+# is stored once per distinct content, compressed, under its SHA-256 hash
+# ("objects"); a snapshot is a small manifest listing the hash of each cell. A save
+# that changes one cell therefore only adds that cell's text and a manifest, and
+# restoring any version reads one manifest and the objects it lists.
+HISTORY_DIR = os.path.join(APP_DATA_DIR, "history")
+
+# Function to get the folder of a document's manifests
+def get_history_path(file_path):
+    document_id = hashlib.sha1(os.path.abspath(file_path).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(HISTORY_DIR, "manifests", document_id)
+
+# Function to get where an object is stored
+def get_history_object_path(content_hash):
+    return os.path.join(HISTORY_DIR, "objects", content_hash[:2], content_hash)
+
+# Function to queue a text for the history store unless it is already there; returns its hash
+def store_history_object(text):
+    data = text.encode('utf-8')
+    content_hash = hashlib.sha256(data).hexdigest()
+    object_path = get_history_object_path(content_hash)
+    if not os.path.exists(object_path):
+        autosave_queue.put(("file", object_path, zlib.compress(data)))
+    return content_hash
+
+# Function to read an object back
+def read_history_object(content_hash):
+    with open(get_history_object_path(content_hash), 'rb') as object_file:
+        return zlib.decompress(object_file.read()).decode('utf-8')
+
+# Function to list a document's snapshots as (version, manifest), oldest first
+def list_snapshots(file_path):
+    history_path = get_history_path(file_path)
+    try:
+        versions = sorted(name[:-5] for name in os.listdir(history_path) if name.endswith(".json"))
+    except OSError:
+        return []
+    snapshots = []
+    for version in versions:
+        try:
+            with open(os.path.join(history_path, version + ".json"), 'r', encoding='utf-8') as manifest_file:
+                snapshots.append((version, json.load(manifest_file)))
+        except (OSError, ValueError):
+            pass  # Still being written, or damaged
+    return snapshots
+
+# Function to record a snapshot of a version 2 document that was just saved; nothing
+# is recorded when no cell, template or metadata changed since the last snapshot
+def record_snapshot(file_path, document):
+    start_autosave_thread()
+    cells = [{"row": cell["row"], "column": cell["column"], "hash": store_history_object(cell["text"]), "metadata": cell.get("metadata")}
+             for cell in document["cells"]]
+    manifest = {"path": os.path.abspath(file_path), "rows": document["rows"], "columns": document["columns"],
+                "metadata": document["metadata"], "template": store_history_object(document["template"] or ""), "cells": cells}
+    # Only the newest manifest is read, however long the history is
+    history_path = get_history_path(file_path)
+    try:
+        latest = max((name for name in os.listdir(history_path) if name.endswith(".json")), default=None)
+    except OSError:
+        latest = None
+    if latest is not None:
+        try:
+            with open(os.path.join(history_path, latest), 'r', encoding='utf-8') as manifest_file:
+                previous = json.load(manifest_file)
+        except (OSError, ValueError):
+            previous = {}
+        compared = ("rows", "columns", "template", "cells")
+        if (all(previous.get(key) == manifest[key] for key in compared)
+                and {**previous.get("metadata", {}), "saved": None} == {**manifest["metadata"], "saved": None}):
+            return None
+    now = time.time()
+    manifest["saved"] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(now))
+    # Names sort in the order the versions were saved
+    version = time.strftime("%Y%m%d-%H%M%S", time.localtime(now)) + f"-{int(now * 1000000) % 1000000:06d}"
+    autosave_queue.put(("file", os.path.join(get_history_path(file_path), version + ".json"), json.dumps(manifest).encode('utf-8')))
+    return version
+
+# Function to rebuild a document from one snapshot, as parse_grid_document gives it
+def load_snapshot(file_path, version):
+    with open(os.path.join(get_history_path(file_path), version + ".json"), 'r', encoding='utf-8') as manifest_file:
+        manifest = json.load(manifest_file)
+    cells = {(cell["row"], cell["column"]): read_history_object(cell["hash"]) for cell in manifest["cells"]}
+    cells_metadata = {(cell["row"], cell["column"]): cell["metadata"] for cell in manifest["cells"] if cell.get("metadata")}
+    return {"version": GRID_SCHEMA_VERSION, "rows": manifest["rows"], "columns": manifest["columns"], "metadata": manifest["metadata"],
+            "template": read_history_object(manifest["template"]) or None, "cells": cells, "cell_metadata": cells_metadata, "skipped": []}
+
+# Function to open the version history of the current document
+def open_version_history():
+    if not current_document_path:
+        messagebox.showinfo("Version History", "Save the grid first; every save after that is kept here.")
+        return
+    window = tk.Toplevel(root)
+    window.title(f"Version History - {os.path.basename(current_document_path)}")
+    window.geometry("450x450")
+    tree = ttk.Treeview(window, columns=("changed",), selectmode="browse")
+    tree.heading("#0", text="Saved")
+    tree.heading("changed", text="Cells changed")
+    tree.column("changed", width=120, anchor="e")
+    tree.pack(side=tk.TOP, fill=tk.BOTH, expand=True, padx=10, pady=10)
+    status_label = tk.Label(window, text="", font=("TkDefaultFont", 10), anchor="w")
+    status_label.pack(side=tk.TOP, fill=tk.X, padx=10)
+    document_path = current_document_path
+
+    # Function to list the snapshots, newest first, with how many cells each changed
+    def refresh():
+        tree.delete(*tree.get_children())
+        previous_hashes = {}
+        rows = []
+        for version, manifest in list_snapshots(document_path):
+            hashes = {(cell["row"], cell["column"]): cell["hash"] for cell in manifest["cells"]}
+            changed = sum(1 for position, content_hash in hashes.items() if previous_hashes.get(position) != content_hash)
+            rows.append((version, manifest.get("saved", version), changed))
+            previous_hashes = hashes
+        for version, saved, changed in reversed(rows):
+            tree.insert("", tk.END, iid=version, text=saved, values=(changed,))
+        status_label.config(text=f"{len(rows)} versions")
+
+    # Function to put the selected version back into the grid
+    def restore():
+        selection = tree.selection()
+        if not selection:
+            return
+        started = time.perf_counter()
+        try:
+            document = load_snapshot(document_path, selection[0])
+        except (OSError, ValueError, zlib.error) as error:
+            messagebox.showerror("Version History", f"Could not restore this version: {error}", parent=window)
+            return
+        show_document(document, document_path)
+        status_label.config(text=f"Restored {tree.item(selection[0], 'text')} in {(time.perf_counter() - started) * 1000:.0f} ms; save to keep it")
+
+    button_frame = tk.Frame(window)
+    button_frame.pack(side=tk.TOP, fill=tk.X, padx=10, pady=10)
+    for text, command in (("Restore", restore), ("Refresh", refresh), ("Close", window.destroy)):
+        tk.Button(button_frame, text=text, command=command, font=("TkDefaultFont", 12)).pack(side=tk.LEFT, expand=True, fill=tk.X)
+    refresh()
+
+# Edit tracking: every cell reports its changes (debounced) to the listeners below.
+# Each listener is called as listener(row, col, start, old_end, new_end, text, origin)
+# where text[start:new_end] replaced old_text[start:old_end].
+EDIT_DEBOUNCE_MS = 300
+cell_keys = {}  # Widget path -> (row, col)
+cell_texts = {}  # (row, col) -> text as of the last processed change
+cell_versions = {}  # (row, col) -> counter bumped on every processed change
+cell_change_jobs = {}  # (row, col) -> pending after() id
+cell_change_listeners = []
+
+# Function to iterate over the text cells of the grid
+def iter_cells():
+    for row in range(GRID_ROWS):
+        for col in range(GRID_COLUMNS):
+            if entries[row][col] is not None:
+                yield row, col, entries[row][col]
+
+# Function to read the full text of a cell, without the trailing newline Tk adds
+def get_cell_text(row, col):
+    return entries[row][col].get("1.0", "end-1c")
+
+# Function to find the single changed region between two versions of a text
+def find_changed_region(old, new):
+    # Binary search on slices keeps the comparisons inside C string code
+    low, high = 0, min(len(old), len(new))
+    while low < high:
+        mid = (low + high + 1) // 2
+        if old[:mid] == new[:mid]:
+            low = mid
+        else:
+            high = mid - 1
+    prefix = low
+    low, high = 0, min(len(old), len(new)) - prefix
+    while low < high:
+        mid = (low + high + 1) // 2
+        if old[len(old) - mid:] == new[len(new) - mid:]:
+            low = mid
+        else:
+            high = mid - 1
+    return prefix, len(old) - low, len(new) - low
+
+# Function to process a cell's pending change right away and return its text
+def refresh_cell_text(row, col, origin="edit"):
+    key = (row, col)
+    job = cell_change_jobs.pop(key, None)
+    if job is not None:
+        root.after_cancel(job)
+    old = cell_texts.get(key, "")
+    if key in loading_cells:
+        return old  # Only part of the new text is in, it is processed once it is complete
+    text = get_cell_text(row, col)
+    if text == old:
+        return text
+    start, old_end, new_end = find_changed_region(old, text)
+    cell_texts[key] = text
+    cell_versions[key] = cell_versions.get(key, 0) + 1
+    for listener in cell_change_listeners:
+        listener(row, col, start, old_end, new_end, text, origin)
+    return text
+
+# Function called by Tk whenever a cell is modified
+def on_cell_modified(event):
+    widget = event.widget
+    if not widget.edit_modified():
+        return  # This event was triggered by resetting the flag below
+    widget.edit_modified(False)
+    key = cell_keys.get(str(widget))
+    if key is None or key in loading_cells:
+        return
+    job = cell_change_jobs.get(key)
+    if job is not None:
+        root.after_cancel(job)
+    cell_change_jobs[key] = root.after(EDIT_DEBOUNCE_MS, lambda: refresh_cell_text(*key))
+
+# Autosave and crash recovery: every processed edit is handed to a worker thread
+# that appends it to a journal, so a slow disk never holds up typing. The journal
+# is "<document file name>.journal", such as "notes.wtgrid.journal" (or one per
+# process in the app folder for a grid that was never saved): one JSON object per line, a snapshot of every cell followed by edits
+# {"cell", "start", "end", "text"} where text replaced cell[start:end]. Appends
+# reach the operating system right away, so nothing is lost if the app dies, but
+# are only forced to disk (fsync) once per JOURNAL_FSYNC_SECONDS. A while after
+# typing stops, a fresh snapshot replaces the file once the edits since the last
+# one get long compared to it. Each running instance has its own session marker,
+# so several windows can be open at once and each crash is recovered separately.
+AUTOSAVE_DELAY_MS = 2000
+JOURNAL_COMPACT_RECORDS = 200  # Also bounds how many edits a load has to replay
+JOURNAL_COMPACT_RATIO = 0.5  # Compact once the edits are this large compared to the snapshot
+JOURNAL_FSYNC_SECONDS = 1.0
+SESSION_PATH = os.path.join(APP_DATA_DIR, f"session-{os.getpid()}.json")  # Removed again on a clean exit
+SESSION_MARKER_PATTERN = re.compile(r"session-(\d+)\.json")
+UNSAVED_JOURNAL_PATH = os.path.join(APP_DATA_DIR, f"autosave-{os.getpid()}.journal")
+autosave_job = None
+autosave_queue = queue.Queue()
+autosave_thread = None
+autosave_busy = False  # True while the worker is writing
+autosave_result = None  # (finished at, seconds, bytes, compacted, error) of the last write
+journal_path = None  # Journal the edits are appended to; None until a snapshot was queued
+journal_tail = [0, 0]  # Edits and characters appended since the last snapshot
+journal_snapshot_chars = 0
+
+# Function to get the journal of a document file. The extension is kept, so
+# "notes.json" and "notes.wtgrid" in one folder have separate journals.
+def get_document_journal_path(file_path):
+    return file_path + ".journal"
+
+# Function to get where the grid is journaled
+def get_journal_path():
+    if current_document_path:
+        return get_document_journal_path(current_document_path)
+    return UNSAVED_JOURNAL_PATH
+
+# Function to write a file so that it is either fully replaced or left alone:
+# write a temporary file next to it, flush it to disk, then rename it over the old one
+def write_file_atomic(path, data):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, 'wb') as temp_file:
+            temp_file.write(data)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        os.replace(temp_path, path)
+    except OSError:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    if hasattr(os, "O_DIRECTORY"):
+        # Make the rename itself survive a crash
+        directory_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(directory_fd)
+        finally:
+            os.close(directory_fd)
+
+# Function to encode journal entries, one JSON object per line
+def encode_journal_lines(entries_to_write):
+    return "".join(json.dumps(entry) + "\n" for entry in entries_to_write).encode('utf-8')
+
+# Function to read a journal back into {"01": text} by replaying its edits on its
+# snapshot. A line cut short by a crash ends the replay. Returns None if there is no journal.
+def read_journal(path):
+    try:
+        with open(path, 'rb') as journal_file:
+            lines = journal_file.read().split(b"\n")
+    except OSError:
+        return None
+    cells = None
+    for line in lines:
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            break
+        if "snapshot" in entry:
+            cells = dict(entry["snapshot"])
+        elif cells is not None:
+            text = cells.get(entry["cell"], "")
+            cells[entry["cell"]] = text[:entry["start"]] + entry["text"] + text[entry["end"]:]
+    return cells
+
+# Function run by the autosave thread: write the queued items in order.
+# ("snapshot", path, cells) replaces a journal, ("append", path, edits) extends it,
+# ("file", path, bytes) replaces any small file, ("remove", path, None) deletes one
+# and ("sync", None, None) forces the journal to disk now.
+def autosave_worker():
+    global autosave_busy, autosave_result
+    journal_file = None  # Append handle, kept open between batches
+    unsynced = False
+    last_sync = time.perf_counter()
+    while True:
+        try:
+            items = [autosave_queue.get(timeout=JOURNAL_FSYNC_SECONDS if unsynced else None)]
+        except queue.Empty:
+            items = []  # Typing stopped with appends still waiting for an fsync
+        while True:
+            try:
+                items.append(autosave_queue.get_nowait())
+            except queue.Empty:
+                break
+        autosave_busy = True
+        started = time.perf_counter()
+        written = 0
+        compacted = False
+        error = None
+        # Journal writes before the newest snapshot are already part of it
+        first = max((position for position, item in enumerate(items) if item[0] == "snapshot"), default=0)
+        try:
+            for position, (kind, path, payload) in enumerate(items):
+                if kind == "file":
+                    write_file_atomic(path, payload)
+                elif kind == "remove":
+                    if os.path.exists(path):
+                        os.remove(path)
+                elif kind == "snapshot" and position >= first:
+                    if journal_file is not None:
+                        journal_file.close()
+                        journal_file = None
+                    data = encode_journal_lines([{"snapshot": payload}])
+                    write_file_atomic(path, data)
+                    written += len(data)
+                    compacted = True
+                    unsynced = False
+                elif kind == "append" and position >= first:
+                    if journal_file is None or journal_file.name != path:
+                        if journal_file is not None:
+                            os.fsync(journal_file.fileno())
+                            journal_file.close()
+                        journal_file = open(path, 'ab')
+                    data = encode_journal_lines(payload)
+                    journal_file.write(data)
+                    written += len(data)
+                    unsynced = True
+            if journal_file is not None:
+                journal_file.flush()
+                now = time.perf_counter()
+                force = not items or any(item[0] == "sync" for item in items)
+                if unsynced and (force or now - last_sync >= JOURNAL_FSYNC_SECONDS):
+                    os.fsync(journal_file.fileno())
+                    unsynced = False
+                    last_sync = now
+        except OSError as write_error:
+            error = str(write_error)
+            if journal_file is not None:
+                journal_file.close()
+                journal_file = None
+            unsynced = False
+        if written or error:
+            autosave_result = (time.time(), time.perf_counter() - started, written, compacted, error)
+        autosave_busy = False
+        for item in items:
+            autosave_queue.task_done()
+
+# Function to start the autosave thread the first time it is needed
+def start_autosave_thread():
+    global autosave_thread
+    if autosave_thread is None:
+        autosave_thread = threading.Thread(target=autosave_worker, daemon=True)
+        autosave_thread.start()
+
+# Function to record which journal holds this session's work, so a crash can be recovered
+def write_session_marker():
+    start_autosave_thread()
+    marker = {"pid": os.getpid(), "journal": journal_path, "document": current_document_path}
+    autosave_queue.put(("file", SESSION_PATH, json.dumps(marker).encode('utf-8')))
+
+# Function to start the journal over from a snapshot when there is none yet, the
+# document changed, a write failed or the edits have grown too long
+def queue_autosave():
+    global autosave_job, journal_path, journal_snapshot_chars
+    autosave_job = None
+    start_autosave_thread()
+    for row, col, text_widget in iter_cells():
+        refresh_cell_text(row, col)
+    path = get_journal_path()
+    if autosave_result is not None and autosave_result[4] is not None:
+        journal_path = None  # The last write failed, so the journal may be missing edits
+    if path != journal_path or journal_tail[0] > JOURNAL_COMPACT_RECORDS or journal_tail[1] > JOURNAL_COMPACT_RATIO * journal_snapshot_chars + 65536:
+        cells = {cell_key(row, col): cell_texts.get((row, col), "") for row, col, text_widget in iter_cells()}
+        autosave_queue.put(("snapshot", path, cells))
+        if path != journal_path:
+            journal_path = path
+            write_session_marker()
+        journal_tail[:] = [0, 0]
+        journal_snapshot_chars = sum(len(text) for text in cells.values())
+    update_autosave_status()
+
+# Function to append each edit to the journal as it is processed
+def autosave_listener(row, col, start, old_end, new_end, text, origin):
+    global autosave_job, journal_path
+    if origin == "load" or not autosave_var.get():
+        journal_path = None  # The next autosave starts the journal over from a snapshot
+        return
+    if journal_path is not None and journal_path == get_journal_path():
+        inserted = text[start:new_end]
+        autosave_queue.put(("append", journal_path, [{"cell": cell_key(row, col), "start": start, "end": old_end, "text": inserted}]))
+        journal_tail[0] += 1
+        journal_tail[1] += len(inserted)
+    if autosave_job is not None:
+        root.after_cancel(autosave_job)
+    autosave_job = root.after(AUTOSAVE_DELAY_MS, queue_autosave)
+
+cell_change_listeners.append(autosave_listener)
+
+# Function to show the last autosave and how many are waiting, polling while busy
+def update_autosave_status():
+    waiting = autosave_queue.qsize() + (1 if autosave_busy else 0)
+    if autosave_result is None:
+        status = "Autosave: nothing saved yet"
+    elif autosave_result[4] is not None:
+        status = f"Autosave failed: {autosave_result[4]}"
+    else:
+        finished, seconds, size, compacted, error = autosave_result
+        status = (f"Autosaved {time.strftime('%H:%M:%S', time.localtime(finished))} in {seconds * 1000:.0f} ms"
+                  f" ({size / 1024:.1f} KB{', compacted' if compacted else ''})")
+    autosave_status_label.config(text=f"{status}, {waiting} queued")
+    if waiting:
+        root.after(200, update_autosave_status)
+
+# Function to check whether a process is still running. On POSIX signal 0 tests for
+# the process without touching it; on Windows its exit code is asked for.
+def is_process_running(pid):
+    if pid <= 0 or pid == os.getpid():
+        return False
+    if os.name == "nt":
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        exit_code = ctypes.c_ulong()
+        kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+        kernel32.CloseHandle(handle)
+        return exit_code.value == 259  # STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+# Function to list the session markers of instances that are no longer running,
+# newest first, as (marker path, marker) pairs
+def find_crashed_sessions():
+    try:
+        names = os.listdir(APP_DATA_DIR)
+    except OSError:
+        return []
+    sessions = []
+    for name in names:
+        match = SESSION_MARKER_PATTERN.fullmatch(name)
+        path = os.path.join(APP_DATA_DIR, name)
+        if match is None or path == SESSION_PATH or is_process_running(int(match.group(1))):
+            continue
+        try:
+            with open(path, 'r', encoding='utf-8') as marker_file:
+                marker = json.load(marker_file)
+            modified = os.path.getmtime(path)
+        except (OSError, ValueError):
+            continue
+        if isinstance(marker, dict):
+            sessions.append((modified, path, marker))
+    return [(path, marker) for modified, path, marker in sorted(sessions, key=lambda session: session[0], reverse=True)]
+
+# Function to restore the cells from the journal of the newest session that did not
+# exit cleanly; any older ones are offered on the next start. Called once at
+# startup, before anything is typed.
+def recover_session():
+    global current_document_path
+    recovered = None
+    crashed = find_crashed_sessions()
+    for position, (marker_path, marker) in enumerate(crashed):
+        started = time.perf_counter()
+        cells = read_journal(marker["journal"]) if marker.get("journal") else None
+        if not cells:
+            autosave_queue.put(("remove", marker_path, None))  # Nothing to recover
+            continue
+        current_document_path = marker.get("document")
+        if current_document_path:
+            load_ignore_list(current_document_path)
+        populate_cells({parse_cell_key(key): text for key, text in cells.items()})
+        recovered = (len(cells), time.perf_counter() - started, marker_path, marker["journal"], len(crashed) - position - 1)
+        break
+    write_session_marker()
+    if recovered is not None:
+        cell_count, seconds, marker_path, old_journal_path, remaining = recovered
+        # Journal the recovered text right away under this session, then retire the old one
+        if autosave_var.get():
+            queue_autosave()
+            if old_journal_path != get_journal_path():
+                autosave_queue.put(("remove", old_journal_path, None))
+        autosave_queue.put(("remove", marker_path, None))
+        status = f"Recovered {cell_count} cells from the last session in {seconds * 1000:.0f} ms"
+        if remaining:
+            status += f" ({remaining} older {'session is' if remaining == 1 else 'sessions are'} offered on the next start)"
+        autosave_status_label.config(text=status)
+
+# Function to write any pending autosave before the window closes and mark the exit as clean
+def on_close():
+    if autosave_job is not None:
+        root.after_cancel(autosave_job)
+        queue_autosave()
+    autosave_queue.put(("sync", None, None))
+    autosave_queue.join()
+    for path in (SESSION_PATH, UNSAVED_JOURNAL_PATH):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    root.destroy()
+
+# Shared tokenizer: one regex pass giving (start, end, normalized_word) spans.
+# Words are runs of letters, optionally joined by apostrophes ("don't").
+WORD_PATTERN = re.compile(r"[^\W\d_]+(?:['\u2019][^\W\d_]+)*")
+cell_token_cache = {}  # (row, col) -> (version, tokens)
+cell_line_cache = {}  # (row, col) -> (version, line map)
+
+# Function to split text into word spans, optionally only between two offsets
+def tokenize(text, start=0, end=None):
+    if end is None:
+        end = len(text)
+    return [(match.start(), match.end(), match.group().lower().replace("\u2019", "'"))
+            for match in WORD_PATTERN.finditer(text, start, end)]
+
+# Function to get the cached tokens of a cell, tokenizing only if it changed
+def get_cell_tokens(row, col):
+    key = (row, col)
+    text = refresh_cell_text(row, col)
+    version = cell_versions.get(key, 0)
+    cached = cell_token_cache.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    tokens = tokenize(text)
+    cell_token_cache[key] = (version, tokens)
+    return tokens
+
+# Function to patch a cell's cached tokens after an edit instead of re-tokenizing it
+def token_cache_listener(row, col, start, old_end, new_end, text, origin):
+    key = (row, col)
+    cached = cell_token_cache.get(key)
+    version = cell_versions[key]
+    if cached is None or cached[0] != version - 1:
+        return  # Not cached (or stale), get_cell_tokens will tokenize from scratch
+    delta = new_end - old_end
+    # Tokens never contain whitespace, so tokenizing between whitespace boundaries
+    # gives exactly the tokens a full pass would
+    while start > 0 and not text[start - 1].isspace():
+        start -= 1
+    while new_end < len(text) and not text[new_end].isspace():
+        new_end += 1
+    tokens = cached[1]
+    first = bisect.bisect_left(tokens, start, key=lambda token: token[0])
+    last = bisect.bisect_left(tokens, new_end - delta, key=lambda token: token[0])
+    tail = [(token_start + delta, token_end + delta, word) for token_start, token_end, word in tokens[last:]] if delta else tokens[last:]
+    cell_token_cache[key] = (version, tokens[:first] + tokenize(text, start, new_end) + tail)
+
+cell_change_listeners.append(token_cache_listener)
+
+# Inverted word index over the whole grid: normalized word -> {(row, col): start
+# offsets}, with a running word frequency table. After each change only the
+# edited cell's entries are rebuilt (from its incrementally patched tokens).
+word_index = {}  # word -> {(row, col): sorted start offsets}
+word_frequencies = collections.Counter()
+cell_index_words = {}  # (row, col) -> {word: start offsets} as currently in word_index
+cell_index_versions = {}  # (row, col) -> cell version the entries were built from
+
+# Function to bring one cell's entries in the word index up to date
+def index_cell(row, col):
+    key = (row, col)
+    tokens = get_cell_tokens(row, col)
+    version = cell_versions.get(key, 0)
+    if cell_index_versions.get(key) == version and key in cell_index_words:
+        return
+    new_words = {}
+    for start, end, word in tokens:
+        offsets = new_words.get(word)
+        if offsets is None:
+            new_words[word] = [start]
+        else:
+            offsets.append(start)
+    old_words = cell_index_words.get(key, {})
+    for word, offsets in old_words.items():
+        if word not in new_words:
+            postings = word_index[word]
+            del postings[key]
+            if not postings:
+                del word_index[word]
+            word_frequencies[word] -= len(offsets)
+            if word_frequencies[word] <= 0:
+                del word_frequencies[word]
+    for word, offsets in new_words.items():
+        word_frequencies[word] += len(offsets) - len(old_words.get(word, ()))
+        word_index.setdefault(word, {})[key] = offsets
+    cell_index_words[key] = new_words
+    cell_index_versions[key] = version
+
+# Function to keep the word index current as cells are edited. Loaded text is
+# indexed on the first lookup instead, so loading a big grid stays fast.
+def word_index_listener(row, col, start, old_end, new_end, text, origin):
+    if origin != "load" and (row, col) in cell_index_words:
+        index_cell(row, col)
+
+cell_change_listeners.append(word_index_listener)
+
+# Function to make sure every cell is indexed (cheap when nothing changed)
+def update_word_index():
+    for row, col, text_widget in iter_cells():
+        index_cell(row, col)
+
+# Function to normalize a word the way the tokenizer does
+def normalize_word(word):
+    return word.strip().lower().replace("\u2019", "'")
+
+# Function to get the most common words as (word, count) pairs
+def get_word_frequencies(limit=None):
+    update_word_index()
+    return word_frequencies.most_common(limit)
+
+# Function to find the next occurrence of a word after a position, wrapping around
+# the grid. Returns (row, col, start, end) or None.
+def find_next_word(word, row, col, offset):
+    update_word_index()
+    postings = word_index.get(normalize_word(word))
+    if not postings:
+        return None
+    cells = sorted(postings)
+    offsets = postings.get((row, col), [])
+    position = bisect.bisect_left(offsets, offset)
+    if position < len(offsets):
+        cell, start = (row, col), offsets[position]
+    else:
+        # First occurrence in a later cell, or the first one in the grid
+        later = bisect.bisect_right(cells, (row, col))
+        cell = cells[later % len(cells)]
+        start = postings[cell][0]
+    end = WORD_PATTERN.match(cell_texts.get(cell, ""), start).end()
+    return cell[0], cell[1], start, end
+
+# Function to get a cell's (start, end) spans of a word from the index
+def get_word_spans(row, col, word):
+    index_cell(row, col)
+    offsets = word_index.get(normalize_word(word), {}).get((row, col), [])
+    text = cell_texts.get((row, col), "")
+    return [(start, WORD_PATTERN.match(text, start).end()) for start in offsets]
+
+# Tk counts a character above U+FFFF (most emoji) as two columns, Python as one, so
+# a cell's line map also lists the offsets of those characters
+WIDE_CHAR_PATTERN = re.compile("[\U00010000-\U0010FFFF]")
+
+# Function to get a cell's line map: the offsets where each line starts and the
+# sorted offsets of the characters Tk counts twice
+def get_cell_line_map(row, col):
+    key = (row, col)
+    text = refresh_cell_text(row, col)
+    version = cell_versions.get(key, 0)
+    cached = cell_line_cache.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    line_starts = [0] + [match.end() for match in re.finditer("\n", text)]
+    wide_chars = [match.start() for match in WIDE_CHAR_PATTERN.finditer(text)]
+    cell_line_cache[key] = (version, (line_starts, wide_chars))
+    return line_starts, wide_chars
+
+# Function to turn a character offset into a Tk "line.column" index
+def offset_to_index(line_map, offset):
+    line_starts, wide_chars = line_map
+    line = bisect.bisect_right(line_starts, offset) - 1
+    column = offset - line_starts[line]
+    if wide_chars:
+        column += bisect.bisect_left(wide_chars, offset) - bisect.bisect_left(wide_chars, line_starts[line])
+    return f"{line + 1}.{column}"
+
+# Function to turn a Tk "line.column" index back into a character offset
+def index_to_offset(line_map, index):
+    line_starts, wide_chars = line_map
+    line, column = map(int, index.split("."))
+    line_start = line_starts[line - 1]
+    first = position = bisect.bisect_left(wide_chars, line_start)
+    # Each wide character before the column took up one extra column
+    while position < len(wide_chars) and wide_chars[position] - line_start + (position - first) < column:
+        position += 1
+    return line_start + column - (position - first)
+
+# Function to tag many (start, end) offset spans with as few Tk calls as possible
+def tag_spans(text_widget, tag, spans, line_map, remove=False):
+    for chunk_start in range(0, len(spans), 1000):
+        indices = []
+        for start, end in spans[chunk_start:chunk_start + 1000]:
+            indices.append(offset_to_index(line_map, start))
+            indices.append(offset_to_index(line_map, end))
+        if indices:
+            # Tk's "tag add" and "tag remove" both accept any number of ranges
+            text_widget.tk.call(text_widget._w, "tag", "remove" if remove else "add", tag, *indices)
+
+# Function to lowercase text without changing its length (so offsets still line up)
+def fold_case(text):
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(char if len(char.lower()) != 1 else char.lower() for char in text)
+
+# Viewport-only highlighting: a highlight's spans are worked out for the whole cell,
+# but only those in the visible part (plus a margin) are tagged. The tagged region
+# grows as the cell is scrolled, so huge cells do not get tens of thousands of tags.
+VIEWPORT_MARGIN_CHARS = 5000
+viewport_highlights = {}  # (row, col) -> {tag: {"compute", "version", "spans", "covered"}}
+viewport_jobs = {}  # (row, col) -> pending after_idle() id
+
+# Function to find the character range shown in a cell, widened by the margin
+def get_visible_range(row, col):
+    text_widget = entries[row][col]
+    text_length = len(refresh_cell_text(row, col))
+    line_map = get_cell_line_map(row, col)
+    first = index_to_offset(line_map, text_widget.index("@0,0"))
+    last = index_to_offset(line_map, text_widget.index(f"@{text_widget.winfo_width()},{text_widget.winfo_height()}"))
+    return max(0, first - VIEWPORT_MARGIN_CHARS), min(text_length, last + VIEWPORT_MARGIN_CHARS)
+
+# Function to list the parts of start..end not already in the sorted covered ranges
+def subtract_ranges(start, end, covered):
+    pieces = []
+    position = start
+    for covered_start, covered_end in covered:
+        if covered_end <= position:
+            continue
+        if covered_start >= end:
+            break
+        if covered_start > position:
+            pieces.append((position, covered_start))
+        position = max(position, covered_end)
+    if position < end:
+        pieces.append((position, end))
+    return pieces
+
+# Function to add a range to a sorted list of ranges, merging overlaps
+def merge_range(covered, start, end):
+    merged = []
+    for range_start, range_end in sorted(covered + [(start, end)]):
+        if merged and range_start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], range_end))
+        else:
+            merged.append((range_start, range_end))
+    return merged
+
+# Function to tag the visible spans of every viewport highlight in a cell
+def extend_viewport_highlights(row, col):
+    viewport_jobs.pop((row, col), None)
+    text_widget = entries[row][col]
+    start, end = get_visible_range(row, col)
+    version = cell_versions.get((row, col), 0)
+    line_map = get_cell_line_map(row, col)
+    for tag, state in viewport_highlights.get((row, col), {}).items():
+        if state["version"] != version:
+            # The text changed, so start again from what is on screen now
+            text_widget.tag_remove(tag, '1.0', tk.END)
+            state.update(version=version, spans=state["compute"](), covered=[])
+        spans = state["spans"]
+        for piece_start, piece_end in subtract_ranges(start, end, state["covered"]):
+            first = bisect.bisect_right(spans, piece_start, key=lambda span: span[1])
+            last = bisect.bisect_left(spans, piece_end, key=lambda span: span[0])
+            tag_spans(text_widget, tag, spans[first:last], line_map)
+        state["covered"] = merge_range(state["covered"], start, end)
+
+# Function called when a cell scrolls: keeps the scrollbar in step and extends highlights
+def on_cell_scrolled(row, col, scrollbar, first, last):
+    scrollbar.set(first, last)
+    if viewport_highlights.get((row, col)) and (row, col) not in viewport_jobs:
+        viewport_jobs[(row, col)] = root.after_idle(lambda: extend_viewport_highlights(row, col))
+
+# Function to highlight spans in a cell; compute_spans() returns sorted (start, end) offsets.
+# In viewport mode only the visible spans are tagged, the rest as the cell scrolls.
+def highlight_cell_spans(row, col, tag, compute_spans):
+    text_widget = entries[row][col]
+    text_widget.tag_remove(tag, '1.0', tk.END)
+    if viewport_only_var.get():
+        viewport_highlights.setdefault((row, col), {})[tag] = {
+            "compute": compute_spans, "version": None, "spans": [], "covered": []}
+        extend_viewport_highlights(row, col)
+    else:
+        viewport_highlights.get((row, col), {}).pop(tag, None)
+        tag_spans(text_widget, tag, compute_spans(), get_cell_line_map(row, col))
+
+# Function to remove a highlight from a cell, including any pending viewport work
+def clear_cell_highlight(row, col, tag):
+    viewport_highlights.get((row, col), {}).pop(tag, None)
+    entries[row][col].tag_remove(tag, '1.0', tk.END)
 
 
 # Function to spell check and highlight misspelled words
 import re  # Import regular expressions to help handle punctuation
 
-import string
-
 # Function to spell check and highlight misspelled words
 def spell_check_highlight():
-    spell = SpellChecker()
-    for row in range(3):
-        for col in range(3):
-            if entries[row][col] is not None:
-                text_widget = entries[row][col]
-                text_widget.tag_remove('misspelled', '1.0', tk.END)
-                text = text_widget.get("1.0", tk.END).strip()
+    for row, col, text_widget in iter_cells():
+        highlight_cell_spans(row, col, 'misspelled', lambda row=row, col=col: [
+            (start, end) for start, end, word in get_cell_misspellings(row, col)])
+
+        # Configure tag properties for misspelled words
+        text_widget.tag_config('misspelled', foreground='red')
 
-                # Split text into words and keep track of their positions
-                words = text.split()
-                start_idx = 0
+# On-disk cache of each cell's misspellings, keyed by a hash of the cell text and
+# stored per dictionary version, so unchanged cells are not checked again after a
+# reload. It records dictionary verdicts only; the personal dictionary and ignore
+# list are applied when reading, since they change independently.
+SPELL_RESULT_CACHE_DIR = os.path.join(APP_DATA_DIR, "spell_cache")
+SPELL_RESULT_CACHE_LIMIT = 2000  # Files kept per dictionary version
 
-                for word in words:
-                    clean_word = word.strip(string.punctuation)
-                    if clean_word and clean_word not in spell:
-                        # Find the position of the word in the text widget
-                        start_pos = f"1.0 + {start_idx}c"
-                        end_pos = f"{start_pos} + {len(word)}c"
-                        text_widget.tag_add('misspelled', start_pos, end_pos)
+# Function to get the cache file for a text under the current dictionary
+def get_spell_result_path(text):
+    text_hash = hashlib.sha256(text.encode("utf-8", "surrogatepass")).hexdigest()
+    return os.path.join(SPELL_RESULT_CACHE_DIR, spell_dictionary_version[:16], text_hash + ".json")
 
-                    # Update start index for the next word, including trailing spaces
-                    start_idx += len(word) + 1
+# Function to store a cell's misspellings, dropping the oldest entries when full
+def write_spell_result(path, misspellings):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as cache_file:
+            json.dump(misspellings, cache_file)
+        with os.scandir(os.path.dirname(path)) as cache_entries:
+            cache_files = [entry for entry in cache_entries if entry.is_file()]
+        if len(cache_files) > SPELL_RESULT_CACHE_LIMIT:
+            cache_files.sort(key=lambda entry: entry.stat().st_mtime)
+            for entry in cache_files[:len(cache_files) - SPELL_RESULT_CACHE_LIMIT]:
+                os.remove(entry.path)
+    except OSError:
+        pass  # The cache is only a shortcut
 
-                # Configure tag properties for misspelled words
-                text_widget.tag_config('misspelled', foreground='red')
+# Function to get the (start, end, word) spans of a cell's misspelled words,
+# from the on-disk cache when the cell text has been checked before
+def get_cell_misspellings(row, col):
+    text = refresh_cell_text(row, col)
+    get_spell_checker()  # The dictionary version is only known once it has loaded
+    path = get_spell_result_path(text)
+    try:
+        with open(path, 'r', encoding='utf-8') as cache_file:
+            misspellings = json.load(cache_file)
+    except (OSError, ValueError):
+        misspellings = [(start, end, word) for start, end, word in get_cell_tokens(row, col)
+                        if not cached_dictionary_lookup(word)]
+        write_spell_result(path, misspellings)
+    return [(start, end, word) for start, end, word in misspellings
+            if word not in personal_words and word not in ignored_words]
 
 # Function to toggle spell check highlight
 def toggle_highlight():
@@ -107,55 +2286,285 @@ def toggle_highlight():
         spell_check_highlight()
     else:
         highlight_btn.config(text="Highlight Spelling Errors")
-        for row in range(3):
-            for col in range(3):
-                if entries[row][col] is not None:
-                    entries[row][col].tag_remove('misspelled', '1.0', tk.END)
+        for row, col, text_widget in iter_cells():
+            clear_cell_highlight(row, col, 'misspelled')
+
+# Function to re-check spelling in part of a cell, between two character offsets
+def recheck_spelling_range(row, col, start, end):
+    text_widget = entries[row][col]
+    tokens = get_cell_tokens(row, col)
+    line_map = get_cell_line_map(row, col)
+    # Widen the range to the words it touches so edits that split or join words are caught
+    first = bisect.bisect_left(tokens, start, key=lambda token: token[1])
+    last = bisect.bisect_right(tokens, end, key=lambda token: token[0])
+    if first < last:
+        start, end = min(start, tokens[first][0]), max(end, tokens[last - 1][1])
+    text_widget.tag_remove('misspelled', offset_to_index(line_map, start), offset_to_index(line_map, end))
+    misspelled = [(token_start, token_end) for token_start, token_end, word in tokens[first:last] if not spell_is_known(word)]
+    tag_spans(text_widget, 'misspelled', misspelled, line_map)
+    text_widget.tag_config('misspelled', foreground='red')
+
+# Function to re-check only the words touched by an edit while live spell check is on
+def live_spell_listener(row, col, start, old_end, new_end, text, origin):
+    if live_spell_var.get() and origin != "load":
+        recheck_spelling_range(row, col, start, new_end)
+
+cell_change_listeners.append(live_spell_listener)
+
+# Function to switch live spell checking on or off
+def toggle_live_spell():
+    if live_spell_var.get():
+        # Start from a full pass, after that only edited words are re-checked
+        spell_check_highlight()
+    elif not highlight_errors:
+        for row, col, text_widget in iter_cells():
+            clear_cell_highlight(row, col, 'misspelled')
 
 # Function to spell check the text in each cell and provide suggestions
 from spellchecker import SpellChecker
-import string
+
+# Pool used to work out suggestions in the background before the prompts start
+suggestion_executor = None
+
+# Function to get the suggestion pool, creating it on first use
+def get_suggestion_executor():
+    global suggestion_executor
+    if suggestion_executor is None:
+        suggestion_executor = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1), thread_name_prefix="suggestions")
+    return suggestion_executor
+
+# Function to find every unknown word once, across all cells, with its number of uses
+def collect_unknown_words():
+    counts = {}
+    for row, col, text_widget in iter_cells():
+        for start, end, word in get_cell_tokens(row, col):
+            counts[word] = counts.get(word, 0) + 1
+    return {word: count for word, count in counts.items() if not spell_is_known(word)}
+
+# Function to work out candidates for some words on the pool without blocking the window.
+# on_progress(done, total) is called while waiting, on_ready(prepared) once all are done.
+def prepare_suggestions(words, on_ready, on_progress):
+    use_symspell = symspell_var.get()
+    futures = [get_suggestion_executor().submit(spell_candidates, word, use_symspell) for word in words]
+
+    def wait_for_suggestions():
+        done = sum(future.done() for future in futures)
+        if done < len(futures):
+            on_progress(done, len(futures))
+            root.after(100, wait_for_suggestions)
+            return
+        on_ready({word: future.result() for word, future in zip(words, futures)})
+
+    wait_for_suggestions()
 
 # Function to spell check the text in each cell and provide suggestions
 def spell_check_suggestions():
-    spell = SpellChecker()
+    if not precompute_suggestions_var.get():
+        run_spelling_review(None)
+        return
+
+    spell_check_suggest_btn.config(state=tk.DISABLED)
+
+    def show_progress(done, total):
+        spell_check_suggest_btn.config(text=f"Preparing Suggestions ({done}/{total})")
+
+    # Start the prompts only once every suggestion is ready
+    def start_review(prepared):
+        spell_check_suggest_btn.config(text="Spell Check with Suggestions", state=tk.NORMAL)
+        run_spelling_review(prepared)
+
+    prepare_suggestions(list(collect_unknown_words()), start_review, show_progress)
+
+# Function to walk through the unknown words, prompting for each correction.
+# prepared maps words to ready-made candidates; words missing from it are looked up on the spot.
+def run_spelling_review(prepared):
     corrections = {}
 
-    for row in range(3):
-        for col in range(3):
-            if entries[row][col] is not None:
-                text_widget = entries[row][col]
-                text = text_widget.get("1.0", tk.END).strip()
-                
-                # Split text into words and clean punctuation
-                words = text.split()
-                for word in words:
-                    clean_word = word.strip(string.punctuation).lower()  # Clean punctuation and make lowercase
-                    if clean_word and clean_word not in spell:
-                        # Get suggestions only if the word is not recognized
-                        if word in corrections:
-                            suggestion = corrections[word]
-                        else:
-                            suggestions = spell.candidates(clean_word)
-                            if suggestions:
-                                suggestion = simpledialog.askstring(
-                                    "Spell Check", 
-                                    f"Suggestions for '{word}': {', '.join(suggestions)}\nEnter correction:", 
-                                    initialvalue=spell.correction(clean_word)
-                                )
-                                if suggestion:
-                                    apply_to_all = messagebox.askyesno(
-                                        "Spell Check", 
-                                        f"Apply correction '{suggestion}' to all occurrences of '{word}'?"
-                                    )
-                                    if apply_to_all:
-                                        corrections[word] = suggestion
+    for row, col, text_widget in iter_cells():
+        text = refresh_cell_text(row, col)
+        edits = []
 
+        # Use the shared word spans instead of re-splitting the text
+        for start, end, clean_word in get_cell_tokens(row, col):
+            word = text[start:end]
+            suggestion = None
+            if not spell_is_known(clean_word):
+                # Get suggestions only if the word is not recognized
+                if word in corrections:
+                    suggestion = corrections[word]
+                else:
+                    if prepared is not None and clean_word in prepared:
+                        suggestions = prepared[clean_word]
+                    else:
+                        suggestions = spell_candidates(clean_word)
+                    if suggestions:
+                        suggestion = simpledialog.askstring(
+                            "Spell Check", 
+                            f"Suggestions for '{word}': {', '.join(suggestions)}\nEnter correction:", 
+                            initialvalue=suggestions[0]
+                        )
                         if suggestion:
-                            text = text.replace(word, suggestion)
-                
-                text_widget.delete("1.0", tk.END)
-                text_widget.insert("1.0", text)
+                            apply_to_all = messagebox.askyesno(
+                                "Spell Check", 
+                                f"Apply correction '{suggestion}' to all occurrences of '{word}'?"
+                            )
+                            if apply_to_all:
+                                corrections[word] = suggestion
+
+                if suggestion:
+                    edits.append((start, end, suggestion))
+
+        apply_span_edits(row, col, edits)
+
+# Function to give a correction the same capitalization as the word it replaces
+def match_case(original, replacement):
+    if len(original) > 1 and original.isupper():
+        return replacement.upper()
+    if original[:1].isupper():
+        return replacement[:1].upper() + replacement[1:]
+    return replacement
+
+# Function to replace (start, end, new_text) spans of a cell as a single undo step.
+# Only the changed ranges are touched, so tags and undo history elsewhere survive.
+def apply_span_edits(row, col, edits):
+    if not edits:
+        return
+    text_widget = entries[row][col]
+    line_map = get_cell_line_map(row, col)
+    text_widget.config(autoseparators=False)
+    text_widget.edit_separator()
+    # Working from the end keeps the offsets of the earlier spans valid
+    for start, end, new_text in sorted(edits, reverse=True):
+        start_index = offset_to_index(line_map, start)
+        text_widget.delete(start_index, offset_to_index(line_map, end))
+        text_widget.insert(start_index, new_text)
+    text_widget.edit_separator()
+    text_widget.config(autoseparators=True)
+
+# Function to apply {normalized word: correction} to one cell in a single pass
+def apply_corrections(row, col, corrections):
+    text = refresh_cell_text(row, col)
+    edits = [(start, end, match_case(text[start:end], corrections[word]))
+             for start, end, word in get_cell_tokens(row, col) if word in corrections]
+    apply_span_edits(row, col, edits)
+    return len(edits)
+
+# Function to open the non-modal review panel listing every flagged word at once
+def open_spelling_review_panel():
+    panel = tk.Toplevel(root)
+    panel.title("Spelling Review")
+    panel.geometry("600x500")
+    status_label = tk.Label(panel, text="Preparing suggestions...", font=("TkDefaultFont", 12), anchor="w")
+    status_label.pack(side=tk.TOP, fill=tk.X, padx=10, pady=(10, 0))
+
+    tree_frame = tk.Frame(panel)
+    tree_frame.pack(side=tk.TOP, fill=tk.BOTH, expand=True, padx=10, pady=10)
+    tree = ttk.Treeview(tree_frame, columns=("count", "correction", "apply"), selectmode="browse")
+    tree.heading("#0", text="Word")
+    tree.heading("count", text="Uses")
+    tree.heading("correction", text="Correction")
+    tree.heading("apply", text="Apply")
+    tree.column("count", width=60, anchor="e")
+    tree.column("apply", width=60, anchor="center")
+    tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+    tree_scrollbar = tk.Scrollbar(tree_frame, command=tree.yview)
+    tree_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+    tree.config(yscrollcommand=tree_scrollbar.set)
+
+    edit_frame = tk.Frame(panel)
+    edit_frame.pack(side=tk.TOP, fill=tk.X, padx=10)
+    tk.Label(edit_frame, text="Correction:", font=("TkDefaultFont", 12)).pack(side=tk.LEFT)
+    correction_box = ttk.Combobox(edit_frame, font=("TkDefaultFont", 12))
+    correction_box.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+
+    candidates_by_word = {}
+
+    # Function to fill the list once the suggestions are ready
+    def fill_tree(prepared):
+        if not panel.winfo_exists():
+            return  # Closed while the suggestions were being prepared
+        candidates_by_word.update(prepared)
+        tree.delete(*tree.get_children())
+        for word, count in sorted(unknown_words.items()):
+            candidates = prepared.get(word) or []
+            tree.insert("", tk.END, iid=word, text=word, values=(count, candidates[0] if candidates else "", "no"))
+        status_label.config(text=f"{len(unknown_words)} flagged words. Double-click a row to toggle Apply.")
+
+    def show_progress(done, total):
+        if panel.winfo_exists():
+            status_label.config(text=f"Preparing suggestions ({done}/{total})...")
+
+    # Function to load the selected word's candidates into the correction box
+    def on_select(event):
+        selection = tree.selection()
+        if selection:
+            word = selection[0]
+            correction_box.config(values=candidates_by_word.get(word) or [])
+            correction_box.set(tree.set(word, "correction"))
+
+    # Function to flip the Apply mark of a row
+    def on_double_click(event):
+        word = tree.identify_row(event.y)
+        if word:
+            tree.set(word, "apply", "no" if tree.set(word, "apply") == "yes" else "yes")
+
+    # Function to store the typed or chosen correction and mark the row to apply
+    def set_correction(event=None):
+        selection = tree.selection()
+        if selection and correction_box.get().strip():
+            tree.set(selection[0], "correction", correction_box.get().strip())
+            tree.set(selection[0], "apply", "yes")
+
+    # Function to mark every row that has a correction
+    def check_all():
+        for word in tree.get_children():
+            if tree.set(word, "correction"):
+                tree.set(word, "apply", "yes")
+
+    # Function to accept the selected word, either for good or for this document
+    def accept_selected(add_to_dictionary):
+        selection = tree.selection()
+        if not selection:
+            return
+        word = selection[0]
+        if add_to_dictionary:
+            add_to_personal_dictionary(word)
+        else:
+            ignore_word(word)
+        unflag_word(word)
+        tree.delete(word)
+        unknown_words.pop(word, None)
+
+    # Function to apply every marked correction, one pass per cell
+    def apply_checked():
+        corrections = {word: tree.set(word, "correction") for word in tree.get_children()
+                       if tree.set(word, "apply") == "yes" and tree.set(word, "correction")}
+        replaced = sum(apply_corrections(row, col, corrections) for row, col, text_widget in iter_cells())
+        for word in corrections:
+            tree.delete(word)
+            unknown_words.pop(word, None)
+        status_label.config(text=f"Replaced {replaced} words. {len(unknown_words)} flagged words left.")
+
+    # Function to scan the cells again, e.g. after more typing
+    def refresh():
+        unknown_words.clear()
+        unknown_words.update(collect_unknown_words())
+        prepare_suggestions(list(unknown_words), fill_tree, show_progress)
+
+    tree.bind("<<TreeviewSelect>>", on_select)
+    tree.bind("<Double-1>", on_double_click)
+    correction_box.bind("<Return>", set_correction)
+    correction_box.bind("<<ComboboxSelected>>", set_correction)
+
+    button_frame = tk.Frame(panel)
+    button_frame.pack(side=tk.TOP, fill=tk.X, padx=10, pady=10)
+    for text, command in (("Set", set_correction), ("Add to Dictionary", lambda: accept_selected(True)), ("Ignore All", lambda: accept_selected(False))):
+        tk.Button(edit_frame, text=text, command=command, font=("TkDefaultFont", 12)).pack(side=tk.LEFT)
+    for text, command in (("Check All", check_all), ("Apply Checked", apply_checked), ("Rescan", refresh), ("Close", panel.destroy)):
+        tk.Button(button_frame, text=text, command=command, font=("TkDefaultFont", 12)).pack(side=tk.LEFT, expand=True, fill=tk.X)
+
+    unknown_words = {}
+    refresh()
 
 
 # Function to increase font size
@@ -195,29 +2604,635 @@ def highlight_specific_word():
         highlight_word_btn.config(text="Stop Highlighting Specific Word")
         word_to_highlight = simpledialog.askstring("Highlight Word", "Enter the word to highlight:")
         if word_to_highlight:
-            for row in range(3):
-                for col in range(3):
-                    if entries[row][col] is not None:
-                        text_widget = entries[row][col]
-                        text_widget.tag_remove('highlight', '1.0', tk.END)
-                        start_idx = "1.0"
-                        while True:
-                            start_idx = text_widget.search(word_to_highlight, start_idx, stopindex=tk.END, nocase=True)
-                            if not start_idx:
-                                break
-                            end_idx = f"{start_idx}+{len(word_to_highlight)}c"
-                            text_widget.tag_add('highlight', start_idx, end_idx)
-                            start_idx = end_idx
-                        text_widget.tag_config('highlight', foreground='blue')
+            # Uses the same modes as the search field
+            modes = get_search_modes()
+            try:
+                compile_search_pattern(word_to_highlight, *modes)
+            except re.error as error:
+                messagebox.showerror("Highlight Word", f"Invalid pattern: {error}")
+                highlight_specific_word_active = False
+                highlight_word_btn.config(text="Highlight Specific Word")
+                return
+
+            # Function to find the matches: a single word searched as a whole word comes
+            # straight from the word index, anything else (parts of words, phrases, regex,
+            # matching case) is scanned for
+            if WORD_PATTERN.fullmatch(word_to_highlight.strip()) and modes == (False, True, False):
+                def find_matches(row, col):
+                    return get_word_spans(row, col, word_to_highlight)
+            else:
+                timed_out = [False]  # After one cell times out the rest are not scanned
+
+                def find_matches(row, col):
+                    if timed_out[0]:
+                        return []
+                    try:
+                        return find_pattern_matches(refresh_cell_text(row, col), word_to_highlight, *modes)[0]
+                    except TimeoutError:
+                        timed_out[0] = True
+                        return []
+
+            for row, col, text_widget in iter_cells():
+                highlight_cell_spans(row, col, 'highlight', lambda row=row, col=col: find_matches(row, col))
+                text_widget.tag_config('highlight', foreground='blue')
+            if modes[0] and timed_out[0]:
+                messagebox.showwarning("Highlight Word", f"The pattern took over {SEARCH_TIME_BUDGET:g} s in a cell, so the remaining cells were not highlighted.")
     else:
         highlight_word_btn.config(text="Highlight Specific Word")
-        for row in range(3):
-            for col in range(3):
-                if entries[row][col] is not None:
-                    entries[row][col].tag_remove('highlight', '1.0', tk.END)
+        for row, col, text_widget in iter_cells():
+            clear_cell_highlight(row, col, 'highlight')
+
+# Watch list: words or phrases highlighted together, each in its own color. All
+# terms are found in a single pass over each cell with an Aho-Corasick automaton
+# (a trie of the terms with failure links), matching case-insensitively.
+WATCH_LIST_PATH = os.path.join(APP_DATA_DIR, "watch_list.json")
+watch_terms = []  # [term, color] pairs, in the order shown in the Watch List window
+watch_automaton = None
+watch_highlight_active = False
+watch_match_cache = {}  # (row, col) -> (version, automaton, matches per term)
+
+# Function to build the automaton: goto transitions, failure links, and for each
+# state the ids of the terms that end there
+def build_aho_corasick(terms):
+    goto, fail, output = [{}], [0], [[]]
+    for term_id, term in enumerate(terms):
+        state = 0
+        for char in term:
+            next_state = goto[state].get(char)
+            if next_state is None:
+                next_state = len(goto)
+                goto.append({})
+                fail.append(0)
+                output.append([])
+                goto[state][char] = next_state
+            state = next_state
+        output[state].append(term_id)
+    # Breadth-first, so every failure link points to a state that is already finished
+    queue = collections.deque(goto[0].values())
+    while queue:
+        state = queue.popleft()
+        for char, next_state in goto[state].items():
+            queue.append(next_state)
+            fallback = fail[state]
+            while fallback and char not in goto[fallback]:
+                fallback = fail[fallback]
+            fail[next_state] = goto[fallback].get(char, 0)
+            output[next_state] = output[next_state] + output[fail[next_state]]
+    return goto, fail, output, [len(term) for term in terms]
+
+# Function to find every term in a text in one pass, as a list of (start, end) spans per term
+def find_terms(automaton, text):
+    goto, fail, output, lengths = automaton
+    matches = [[] for _ in lengths]
+    state = 0
+    for position, char in enumerate(text, 1):
+        while state and char not in goto[state]:
+            state = fail[state]
+        state = goto[state].get(char, 0)
+        for term_id in output[state]:
+            matches[term_id].append((position - lengths[term_id], position))
+    return matches
+
+# Function to get a cell's watch list matches, scanning it at most once per version
+def get_watch_matches(row, col):
+    text = refresh_cell_text(row, col)
+    version = cell_versions.get((row, col), 0)
+    cached = watch_match_cache.get((row, col))
+    if cached is not None and cached[0] == version and cached[1] is watch_automaton:
+        return cached[2]
+    matches = find_terms(watch_automaton, fold_case(text))
+    watch_match_cache[(row, col)] = (version, watch_automaton, matches)
+    return matches
+
+# Function to load the saved watch list
+def load_watch_list():
+    global watch_automaton
+    try:
+        with open(WATCH_LIST_PATH, 'r', encoding='utf-8') as watch_file:
+            watch_terms[:] = [list(item) for item in json.load(watch_file)]
+    except (OSError, ValueError):
+        watch_terms.clear()
+    watch_automaton = build_aho_corasick([fold_case(term) for term, color in watch_terms])
+
+# Function to save the watch list and rebuild the automaton after a change
+def save_watch_list():
+    global watch_automaton
+    watch_automaton = build_aho_corasick([fold_case(term) for term, color in watch_terms])
+    os.makedirs(APP_DATA_DIR, exist_ok=True)
+    with open(WATCH_LIST_PATH, 'w', encoding='utf-8') as watch_file:
+        json.dump(watch_terms, watch_file)
+
+# Function to remove every watch list tag from every cell
+def clear_watch_highlights():
+    for row, col, text_widget in iter_cells():
+        for tag in text_widget.tag_names():
+            if tag.startswith("watch"):
+                clear_cell_highlight(row, col, tag)
+
+# Function to highlight all watch list terms; each term's spans go to Tk in batched calls
+def highlight_watch_list():
+    global watch_highlight_active
+    watch_highlight_active = True
+    clear_watch_highlights()
+    for row, col, text_widget in iter_cells():
+        for term_id, (term, color) in enumerate(watch_terms):
+            tag = f"watch{term_id}"
+            text_widget.tag_config(tag, background=color)
+            highlight_cell_spans(row, col, tag, lambda row=row, col=col, term_id=term_id: get_watch_matches(row, col)[term_id])
+
+# Function to stop highlighting the watch list
+def stop_watch_highlights():
+    global watch_highlight_active
+    watch_highlight_active = False
+    clear_watch_highlights()
+
+# Function to open the window for editing the watch list
+def open_watch_list():
+    window = tk.Toplevel(root)
+    window.title("Watch List")
+    window.geometry("400x450")
+    term_list = tk.Listbox(window, font=("TkDefaultFont", 12))
+    term_list.pack(side=tk.TOP, fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+    # Function to show the terms, each in its color
+    def refresh_list():
+        term_list.delete(0, tk.END)
+        for term, color in watch_terms:
+            term_list.insert(tk.END, term)
+            term_list.itemconfig(tk.END, background=color)
 
-# Create main window
-root = tk.Tk()
+    # Function to re-apply the highlights after the list changed
+    def list_changed():
+        save_watch_list()
+        refresh_list()
+        if watch_highlight_active:
+            highlight_watch_list()
+
+    add_frame = tk.Frame(window)
+    add_frame.pack(side=tk.TOP, fill=tk.X, padx=10)
+    term_entry = tk.Entry(add_frame, font=("TkDefaultFont", 12))
+    term_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+
+    # Function to add the typed term with a color picked by the user
+    def add_term(event=None):
+        term = term_entry.get().strip()
+        if not term:
+            return
+        color = colorchooser.askcolor(title=f"Color for '{term}'", parent=window)[1]
+        if color:
+            watch_terms.append([term, color])
+            term_entry.delete(0, tk.END)
+            list_changed()
+
+    # Function to remove the selected term
+    def remove_term():
+        for position in reversed(term_list.curselection()):
+            del watch_terms[position]
+        list_changed()
+
+    term_entry.bind("<Return>", add_term)
+    tk.Button(add_frame, text="Add", command=add_term, font=("TkDefaultFont", 12)).pack(side=tk.LEFT)
+    button_frame = tk.Frame(window)
+    button_frame.pack(side=tk.TOP, fill=tk.X, padx=10, pady=10)
+    for text, command in (("Remove", remove_term), ("Highlight", highlight_watch_list), ("Clear", stop_watch_highlights), ("Close", window.destroy)):
+        tk.Button(button_frame, text=text, command=command, font=("TkDefaultFont", 12)).pack(side=tk.LEFT, expand=True, fill=tk.X)
+    refresh_list()
+
+# Live search bar: matches are re-highlighted across all cells as the query is
+# typed. Input is debounced, a newer query cancels a scan still in progress (one
+# cell is scanned per event-loop turn), and extending the query only re-checks
+# the previous matches instead of scanning the cells again.
+SEARCH_DEBOUNCE_MS = 150
+search_job = None
+search_generation = 0  # Bumped on every keystroke so stale scans stop
+search_results = {}  # (row, col) -> (version, folded query, match starts, whether the scan was complete)
+
+# Search modes (regex, whole word, case-sensitive) go through compiled patterns.
+# A scan stops after SEARCH_MATCH_CAP matches in a cell or SEARCH_TIME_BUDGET
+# seconds. Python's re module never lets go of a running match, so regex scans
+# run in a worker process that is killed when a pattern runs past the budget.
+# The live search polls the worker from the event loop instead of waiting on it.
+SEARCH_MATCH_CAP = 10000
+SEARCH_TIME_BUDGET = 1.0
+REGEX_POLL_MS = 10
+regex_pool = None
+search_pending_scan = None  # AsyncResult of the live search's regex scan in progress
+
+# Function to compile a search query for the given modes; recent patterns are cached
+@functools.lru_cache(maxsize=64)
+def compile_search_pattern(query, regex=False, whole_word=False, case_sensitive=False):
+    pattern = query if regex else re.escape(query)
+    if whole_word:
+        pattern = rf"(?<!\w)(?:{pattern})(?!\w)"
+    return re.compile(pattern, 0 if case_sensitive else re.IGNORECASE)
+
+# Function to collect a pattern's (start, end) spans, stopping at the match cap or
+# the time budget. Returns the spans and whether the scan went through the whole text.
+def scan_pattern(pattern, text, cap=SEARCH_MATCH_CAP, budget=SEARCH_TIME_BUDGET):
+    deadline = time.perf_counter() + budget
+    spans = []
+    for match in pattern.finditer(text):
+        if match.end() > match.start():
+            spans.append(match.span())
+            if len(spans) >= cap:
+                return spans, False
+        if time.perf_counter() > deadline:
+            return spans, False
+    return spans, True
+
+# Function run in the regex worker process
+def regex_scan_worker(source, flags, text, cap, budget):
+    return scan_pattern(re.compile(source, flags), text, cap, budget)
+
+# Function to start a regex scan in the worker process. Returns the AsyncResult and
+# the time by which it should be ready.
+def submit_regex_scan(pattern, text, budget=SEARCH_TIME_BUDGET):
+    global regex_pool
+    if regex_pool is None:
+        # Spawned rather than forked, so the worker does not inherit the window or its threads
+        regex_pool = multiprocessing.get_context("spawn").Pool(1)
+    result = regex_pool.apply_async(regex_scan_worker, (pattern.pattern, pattern.flags, text, SEARCH_MATCH_CAP, budget))
+    # Extra second for the worker to start the first time
+    return result, time.perf_counter() + budget + 1.0
+
+# Function to kill the regex worker (a new one is started by the next scan)
+def stop_regex_pool():
+    global regex_pool
+    if regex_pool is not None:
+        regex_pool.terminate()
+        regex_pool = None
+
+# Function to find a query's matches in a text with the given modes. Raises re.error
+# for an invalid regex and TimeoutError for one that runs past the time budget, so
+# callers can stop rather than wait out the budget again on every other cell. A
+# regex scan blocks until the worker answers; the live search polls instead.
+def find_pattern_matches(text, query, regex=False, whole_word=False, case_sensitive=False, budget=SEARCH_TIME_BUDGET):
+    pattern = compile_search_pattern(query, regex, whole_word, case_sensitive)
+    if not regex:
+        return scan_pattern(pattern, text, SEARCH_MATCH_CAP, budget)
+    result, deadline = submit_regex_scan(pattern, text, budget)
+    try:
+        return result.get(timeout=max(0, deadline - time.perf_counter()))
+    except multiprocessing.TimeoutError:
+        stop_regex_pool()
+        raise TimeoutError(f"the pattern took longer than {budget:g} s") from None
+
+# Function to get the modes ticked under the search field
+def get_search_modes():
+    return search_regex_var.get(), search_whole_word_var.get(), search_case_var.get()
+
+# Function to find the query's matches in a cell as (start, end) spans. In the
+# default mode (plain text, ignoring case) matches may overlap, and a query that
+# was only extended re-checks the previous matches. Returns the spans and whether
+# the scan was complete.
+def find_search_matches(row, col, query, modes=(False, False, False)):
+    text = refresh_cell_text(row, col)
+    version = cell_versions.get((row, col), 0)
+    if any(modes):
+        search_results.pop((row, col), None)
+        return find_pattern_matches(text, query, *modes)
+    folded_query = fold_case(query)
+    haystack = fold_case(text)
+    previous = search_results.get((row, col))
+    if previous is not None and previous[0] == version and previous[3] and folded_query.startswith(previous[1]):
+        # The query was only extended, so it can only match where the old one did
+        # (a scan cut short at the match cap may have missed some, so it is redone)
+        starts = [start for start in previous[2] if haystack.startswith(folded_query, start)]
+    else:
+        starts = []
+        start = haystack.find(folded_query)
+        while start != -1 and len(starts) < SEARCH_MATCH_CAP:
+            starts.append(start)
+            start = haystack.find(folded_query, start + 1)
+    complete = len(starts) < SEARCH_MATCH_CAP
+    search_results[(row, col)] = (version, folded_query, starts, complete)
+    return [(start, start + len(query)) for start in starts], complete
+
+# Function called whenever the search field or one of its modes changes
+def on_search_changed(*args):
+    global search_job, search_generation
+    search_generation += 1
+    if search_job is not None:
+        root.after_cancel(search_job)
+    search_job = root.after(SEARCH_DEBOUNCE_MS, start_live_search)
+
+# Function to scan the cells for the current query, one cell per event-loop turn.
+# Regex cells are handed to the worker and polled, so the window stays responsive;
+# the first cell that runs past the time budget stops the scan.
+def start_live_search():
+    global search_job, search_pending_scan
+    search_job = None
+    if search_pending_scan is not None and not search_pending_scan.ready():
+        stop_regex_pool()  # The worker may be stuck on the previous query's pattern
+    search_pending_scan = None
+    query = search_var.get()
+    modes = get_search_modes()
+    generation = search_generation
+    if not query:
+        search_results.clear()
+        for row, col, text_widget in iter_cells():
+            clear_cell_highlight(row, col, 'search')
+        search_count_label.config(text="")
+        return
+    try:
+        compile_search_pattern(query, *modes)
+    except re.error as error:
+        for row, col, text_widget in iter_cells():
+            clear_cell_highlight(row, col, 'search')
+        search_count_label.config(text=f"Invalid pattern: {error}")
+        return
+    cells = list(iter_cells())
+    counts = []
+
+    def scan_next(position):
+        global search_pending_scan
+        if generation != search_generation:
+            return  # The query changed, a newer scan is on its way
+        if position == len(cells):
+            return
+        row, col, text_widget = cells[position]
+        if modes[0]:
+            search_results.pop((row, col), None)
+            search_pending_scan, deadline = submit_regex_scan(compile_search_pattern(query, *modes), refresh_cell_text(row, col))
+            wait_for_scan(position, search_pending_scan, deadline)
+        else:
+            show_matches(position, *find_search_matches(row, col, query, modes))
+
+    # Function to check on a cell's regex scan without blocking the window
+    def wait_for_scan(position, result, deadline):
+        global search_pending_scan
+        if generation != search_generation:
+            return  # Abandoned; the next scan stops the worker if it is still busy
+        row, col, text_widget = cells[position]
+        if result.ready():
+            search_pending_scan = None
+            show_matches(position, *result.get())
+        elif time.perf_counter() > deadline:
+            search_pending_scan = None
+            stop_regex_pool()
+            clear_cell_highlight(row, col, 'search')
+            counts.append(f"{cell_label(row, col)}: timed out")
+            search_count_label.config(text="  ".join(counts) + f" (pattern took over {SEARCH_TIME_BUDGET:g} s, search stopped)")
+        else:
+            root.after(REGEX_POLL_MS, lambda: wait_for_scan(position, result, deadline))
+
+    # Function to highlight a cell's matches and move on to the next cell
+    def show_matches(position, spans, complete):
+        row, col, text_widget = cells[position]
+        highlight_cell_spans(row, col, 'search', lambda spans=spans: spans)
+        text_widget.tag_config('search', background='yellow')
+        counts.append(f"{cell_label(row, col)}: {len(spans)}{'' if complete else '+'}")
+        search_count_label.config(text="  ".join(counts))
+        root.after(1, lambda: scan_next(position + 1))
+
+    scan_next(0)
+
+# Find and replace across the grid. Every match offset in a cell is worked out
+# first, then the replacements are applied from the end of the cell backwards as
+# one undo step, so only the matched text is rewritten.
+
+# Function to work out the replacement text for one match; in regex mode \1 and \g<name> are expanded
+def expand_replacement(pattern, text, start, end, replacement, regex):
+    if not regex:
+        return replacement
+    match = pattern.match(text, start)
+    if match is None or match.end() != end:
+        return replacement
+    return match.expand(replacement)
+
+# Function to collect the (start, end, new_text) edits for every cell as {(row, col): edits}.
+# Also returns whether every cell was scanned completely.
+def find_replacements(query, replacement, modes):
+    pattern = compile_search_pattern(query, *modes)
+    replacements = {}
+    complete = True
+    for row, col, text_widget in iter_cells():
+        text = refresh_cell_text(row, col)
+        spans, cell_complete = find_pattern_matches(text, query, *modes)
+        complete = complete and cell_complete
+        if spans:
+            replacements[(row, col)] = [(start, end, expand_replacement(pattern, text, start, end, replacement, modes[0]))
+                                        for start, end in spans]
+    return replacements, complete
+
+# Function to replace every match in every cell; each cell's edits are one undo step
+def replace_all(query, replacement, modes):
+    replacements, complete = find_replacements(query, replacement, modes)
+    for (row, col), edits in replacements.items():
+        apply_span_edits(row, col, edits)
+        refresh_cell_text(row, col)
+    return sum(len(edits) for edits in replacements.values()), complete
+
+# Function to find the first match at or after a position, going through the cells
+# in grid order and wrapping around. Returns (row, col, start, end) or None.
+def find_next_match(query, modes, row, col, offset):
+    cells = [(cell_row, cell_col) for cell_row, cell_col, text_widget in iter_cells()]
+    first = cells.index((row, col)) if (row, col) in cells else 0
+    for step in range(len(cells) + 1):
+        cell_row, cell_col = cells[(first + step) % len(cells)]
+        spans, complete = find_pattern_matches(refresh_cell_text(cell_row, cell_col), query, *modes)
+        for start, end in spans:
+            if step == 0 and start < offset:
+                continue
+            if step == len(cells) and start >= offset:
+                break
+            return cell_row, cell_col, start, end
+    return None
+
+# Function to select a span of a cell and scroll it into view
+def select_cell_span(row, col, start, end):
+    text_widget = entries[row][col]
+    line_map = get_cell_line_map(row, col)
+    start_index, end_index = offset_to_index(line_map, start), offset_to_index(line_map, end)
+    text_widget.tag_remove(tk.SEL, "1.0", tk.END)
+    text_widget.tag_add(tk.SEL, start_index, end_index)
+    text_widget.mark_set(tk.INSERT, end_index)
+    text_widget.see(start_index)
+
+# Function to open the Find and Replace window
+def open_find_replace():
+    window = tk.Toplevel(root)
+    window.title("Find and Replace")
+    window.geometry("450x500")
+    fields = tk.Frame(window)
+    fields.pack(side=tk.TOP, fill=tk.X, padx=10, pady=10)
+    tk.Label(fields, text="Find:", font=("TkDefaultFont", 12)).grid(row=0, column=0, sticky="w")
+    find_entry = tk.Entry(fields, font=("TkDefaultFont", 12))
+    find_entry.grid(row=0, column=1, sticky="ew")
+    tk.Label(fields, text="Replace with:", font=("TkDefaultFont", 12)).grid(row=1, column=0, sticky="w")
+    replace_entry = tk.Entry(fields, font=("TkDefaultFont", 12))
+    replace_entry.grid(row=1, column=1, sticky="ew")
+    fields.columnconfigure(1, weight=1)
+    find_entry.insert(0, search_var.get())
+
+    mode_frame = tk.Frame(window)
+    mode_frame.pack(side=tk.TOP, fill=tk.X, padx=10)
+    mode_vars = [tk.BooleanVar(value=value) for value in get_search_modes()]
+    for text, variable in zip(("Regex", "Whole word", "Match case"), mode_vars):
+        tk.Checkbutton(mode_frame, text=text, variable=variable, font=("TkDefaultFont", 10)).pack(side=tk.LEFT)
+
+    tree = ttk.Treeview(window, columns=("count",), selectmode="browse", height=9)
+    tree.heading("#0", text="Cell")
+    tree.heading("count", text="Matches")
+    tree.column("count", width=80, anchor="e")
+    tree.pack(side=tk.TOP, fill=tk.BOTH, expand=True, padx=10, pady=10)
+    status_label = tk.Label(window, text="", font=("TkDefaultFont", 12), anchor="w")
+    status_label.pack(side=tk.TOP, fill=tk.X, padx=10)
+    current_match = [None]  # (row, col, start, end, cell version) of the selected match
+
+    # Function to read the query and modes, reporting an invalid pattern
+    def get_query():
+        query = find_entry.get()
+        modes = tuple(variable.get() for variable in mode_vars)
+        if not query:
+            status_label.config(text="Enter text to find")
+            return None, modes
+        try:
+            compile_search_pattern(query, *modes)
+        except re.error as error:
+            status_label.config(text=f"Invalid pattern: {error}")
+            return None, modes
+        return query, modes
+
+    # Function to show how many matches each cell has
+    def preview():
+        query, modes = get_query()
+        tree.delete(*tree.get_children())
+        if query is None:
+            return
+        try:
+            replacements, complete = find_replacements(query, replace_entry.get(), modes)
+        except re.error as error:
+            status_label.config(text=f"Invalid replacement: {error}")
+            return
+        except TimeoutError as error:
+            status_label.config(text=f"Stopped: {error}")
+            return
+        for (row, col), edits in replacements.items():
+            tree.insert("", tk.END, iid=f"{row},{col}", text=cell_label(row, col), values=(len(edits),))
+        total = sum(len(edits) for edits in replacements.values())
+        status_label.config(text=f"{total}{'' if complete else '+'} matches in {len(replacements)} cells")
+
+    # Function to select a match in its cell
+    def select_match(match):
+        row, col, start, end = match
+        select_cell_span(row, col, start, end)
+        current_match[0] = (row, col, start, end, cell_versions.get((row, col), 0))
+        status_label.config(text=f"Match in cell {cell_label(row, col)}")
+
+    # Function to move to the match after the current one
+    def find_next(offset_after=None):
+        query, modes = get_query()
+        if query is None:
+            return
+        if current_match[0] is not None:
+            row, col, start, end, version = current_match[0]
+            offset = end if offset_after is None else offset_after
+        else:
+            row, col, offset = 0, 0, 0
+        try:
+            match = find_next_match(query, modes, row, col, offset)
+        except TimeoutError as error:
+            status_label.config(text=f"Stopped: {error}")
+            return
+        current_match[0] = None
+        if match is None:
+            status_label.config(text="No matches")
+        else:
+            select_match(match)
+
+    # Function to replace the selected match and move to the next one
+    def replace_one():
+        query, modes = get_query()
+        if query is None:
+            return
+        if current_match[0] is None or current_match[0][4] != cell_versions.get(current_match[0][:2], 0):
+            find_next(0 if current_match[0] is None else current_match[0][2])  # The text changed, find the match again
+            return
+        row, col, start, end, version = current_match[0]
+        text = refresh_cell_text(row, col)
+        try:
+            new_text = expand_replacement(compile_search_pattern(query, *modes), text, start, end, replace_entry.get(), modes[0])
+        except re.error as error:
+            status_label.config(text=f"Invalid replacement: {error}")
+            return
+        apply_span_edits(row, col, [(start, end, new_text)])
+        refresh_cell_text(row, col)
+        current_match[0] = (row, col, start, start + len(new_text), cell_versions.get((row, col), 0))
+        find_next()
+
+    # Function to replace every match in the grid
+    def replace_everything():
+        query, modes = get_query()
+        if query is None:
+            return
+        try:
+            count, complete = replace_all(query, replace_entry.get(), modes)
+        except re.error as error:
+            status_label.config(text=f"Invalid replacement: {error}")
+            return
+        except TimeoutError as error:
+            status_label.config(text=f"Stopped, nothing replaced: {error}")
+            return
+        current_match[0] = None
+        tree.delete(*tree.get_children())
+        status_label.config(text=f"Replaced {count} matches" + ("" if complete else " (some cells were cut short, run again for the rest)"))
+
+    button_frame = tk.Frame(window)
+    button_frame.pack(side=tk.TOP, fill=tk.X, padx=10, pady=10)
+    for text, command in (("Count", preview), ("Find Next", find_next), ("Replace", replace_one), ("Replace All", replace_everything), ("Close", window.destroy)):
+        tk.Button(button_frame, text=text, command=command, font=("TkDefaultFont", 12)).pack(side=tk.LEFT, expand=True, fill=tk.X)
+    find_entry.bind("<Return>", lambda event: find_next())
+    find_entry.focus_set()
+
+# Function to open the word frequency table; Find Next jumps to the selected word's next use
+def open_word_frequencies():
+    window = tk.Toplevel(root)
+    window.title("Word Frequencies")
+    window.geometry("350x500")
+    tree_frame = tk.Frame(window)
+    tree_frame.pack(side=tk.TOP, fill=tk.BOTH, expand=True, padx=10, pady=10)
+    tree = ttk.Treeview(tree_frame, columns=("count",), selectmode="browse")
+    tree.heading("#0", text="Word")
+    tree.heading("count", text="Uses")
+    tree.column("count", width=80, anchor="e")
+    tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+    tree_scrollbar = tk.Scrollbar(tree_frame, command=tree.yview)
+    tree_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+    tree.config(yscrollcommand=tree_scrollbar.set)
+    status_label = tk.Label(window, text="", font=("TkDefaultFont", 12), anchor="w")
+    status_label.pack(side=tk.TOP, fill=tk.X, padx=10)
+    last_match = [(0, 0, 0, 0)]
+
+    # Function to fill the table from the index
+    def refresh():
+        tree.delete(*tree.get_children())
+        frequencies = get_word_frequencies()
+        for word, count in frequencies:
+            tree.insert("", tk.END, text=word, values=(count,))
+        status_label.config(text=f"{len(frequencies)} different words")
+
+    # Function to select the next use of the selected word
+    def find_next(event=None):
+        selection = tree.selection()
+        if not selection:
+            return
+        word = tree.item(selection[0], "text")
+        row, col, start, end = last_match[0]
+        match = find_next_word(word, row, col, end)
+        if match is None:
+            status_label.config(text=f"'{word}' is no longer used")
+            return
+        last_match[0] = match
+        select_cell_span(*match)
+        status_label.config(text=f"'{word}' in cell {cell_label(match[0], match[1])}")
+
+    tree.bind("<Double-1>", find_next)
+    button_frame = tk.Frame(window)
+    button_frame.pack(side=tk.TOP, fill=tk.X, padx=10, pady=10)
+    for text, command in (("Find Next", find_next), ("Refresh", refresh), ("Close", window.destroy)):
+        tk.Button(button_frame, text=text, command=command, font=("TkDefaultFont", 12)).pack(side=tk.LEFT, expand=True, fill=tk.X)
+    refresh()
 
 # Function to send the contents of the Template Maker to a chosen box in the main window
 def send_to_main_screen(text_widget):
@@ -239,6 +3254,10 @@ def open_template_maker():
     label.pack(pady=20)
     text_field = tk.Text(template_window, wrap='word', font=("TkDefaultFont", font_size))
     text_field.pack(pady=10, padx=10, fill=tk.BOTH, expand=True)
+    template_status_label = tk.Label(template_window, text="", font=("TkDefaultFont", 10))
+    template_status_label.pack(fill=tk.X)
+    if document_template:
+        text_field.insert("1.0", document_template)
 
     # Function to save the contents of the Template Maker window to a JSON file
     def save_template():
@@ -253,11 +3272,7 @@ def open_template_maker():
     def load_template():
         file_path = filedialog.askopenfilename(filetypes=[("JSON files", "*.json")])
         if file_path:
-            with open(file_path, 'r') as json_file:
-                data = json.load(json_file)
-                if "template" in data:
-                    text_field.delete("1.0", tk.END)
-                    text_field.insert("1.0", data["template"])
+            start_template_load(text_field, file_path, template_status_label)
 
     # Button to save the contents of the Template Maker window
     save_btn = tk.Button(template_window, text="Save Template", command=save_template, font=("TkDefaultFont", 14))
@@ -271,49 +3286,225 @@ def open_template_maker():
     send_btn = tk.Button(template_window, text="Send to Cell Next to Menu", command=lambda: send_to_main_screen(text_field), font=("TkDefaultFont", 14))
     send_btn.pack(pady=10, fill=tk.X)
 
-root.rowconfigure([0, 1, 2], weight=1)
-root.columnconfigure([0, 1, 2], weight=1)
-
-# Create grid and entries
-entries = [[None for _ in range(3)] for _ in range(3)]
-for row in range(3):
-    for col in range(3):
-        if row == 0 and col == 0:
-            # Menu items cell
-            frame = tk.Frame(root, bg=['#FFEEEE', '#EEFFEE', '#EEEEFF', '#FFFFEE', '#EEFFFF', '#FFEFFF', '#F0FFF0', '#FFF0F0', '#F0F0FF'][row * 3 + col])
-            frame.grid(row=row, column=col, padx=5, pady=5, sticky="nsew")
-            import_btn = tk.Button(frame, text="Load", command=import_json, font=("TkDefaultFont", 14))
-            import_btn.pack(side=tk.TOP, fill=tk.X)
-            export_btn = tk.Button(frame, text="Save", command=export_json, font=("TkDefaultFont", 14))
-            export_csv_btn = tk.Button(frame, text="Design", command=export_csv, font=("TkDefaultFont", 14))
-            export_csv_btn.pack(side=tk.TOP, fill=tk.X)
-            export_btn.pack(side=tk.TOP, fill=tk.X)
-            highlight_btn = tk.Button(frame, text="Highlight Spelling Errors", command=toggle_highlight, font=("TkDefaultFont", 14))
-            highlight_btn.pack(side=tk.TOP, fill=tk.X)
-            highlight_word_btn = tk.Button(frame, text="Highlight Specific Word", command=highlight_specific_word, font=("TkDefaultFont", 14))
-            highlight_word_btn.pack(side=tk.TOP, fill=tk.X)
-            spell_check_suggest_btn = tk.Button(frame, text="Spell Check with Suggestions", command=spell_check_suggestions, font=("TkDefaultFont", 14))
-            spell_check_suggest_btn.pack(side=tk.TOP, fill=tk.X)
-            increase_font_btn = tk.Button(frame, text="Increase Font Size", command=increase_font_size, font=("TkDefaultFont", 14))
-            increase_font_btn.pack(side=tk.TOP, fill=tk.X)
-            decrease_font_btn = tk.Button(frame, text="Decrease Font Size", command=decrease_font_size, font=("TkDefaultFont", 14))
-            decrease_font_btn.pack(side=tk.TOP, fill=tk.X)
-            template_maker_btn = tk.Button(frame, text="Open Template Maker", command=open_template_maker, font=("TkDefaultFont", 14))
-            template_maker_btn.pack(side=tk.TOP, fill=tk.X)
+# Function to build a compiled dictionary from the stock dictionary and word lists.
+# Word list lines hold a word, optionally followed by its frequency.
+def build_dictionary_command(args):
+    word_counts = {}
+    if not args.no_stock:
+        word_counts.update(SpellChecker(language=args.language).word_frequency.dictionary)
+    for word_list in args.word_lists:
+        with open(word_list, 'r', encoding='utf-8') as word_file:
+            for line in word_file:
+                parts = line.split()
+                if not parts:
+                    continue
+                count = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 1
+                word = parts[0].lower()
+                word_counts[word] = max(word_counts.get(word, 0), count)
+    started = time.perf_counter()
+    write_compiled_dictionary(args.output, word_counts.items())
+    print(f"Wrote {len(word_counts)} words to {args.output} "
+          f"({os.path.getsize(args.output) / (1024 * 1024):.1f} MB) in {time.perf_counter() - started:.2f} s")
+    return 0
+
+# Function to list the grid documents under some files and folders, as they are found
+def iter_document_paths(inputs):
+    for path in inputs:
+        if os.path.isdir(path):
+            for directory, subdirectories, file_names in os.walk(path):
+                subdirectories.sort()
+                for file_name in sorted(file_names):
+                    if file_name.endswith((".json", ".wtgrid")):
+                        yield os.path.join(directory, file_name)
         else:
-            # Add cell name as a label
-            cell_name = f"{row * 3 + col + 1:02}"
-            label = tk.Label(root, text=cell_name, font=("TkDefaultFont", 14))
-            label.grid(row=row, column=col, padx=5, pady=(5, 0), sticky="nsew")
-            # Text input fields for other cells
-            frame = tk.Frame(root)
-            frame.grid(row=row, column=col, padx=5, pady=(0, 5), sticky="nsew")
-            entry = tk.Text(frame, wrap='word', height=1, font=("TkDefaultFont", 14))
-            entry.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-            scrollbar = tk.Scrollbar(frame, command=entry.yview)
-            scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-            entry.config(yscrollcommand=scrollbar.set)
-            entries[row][col] = entry
-
-# Start the Tkinter loop
-root.mainloop()
+            yield path
+
+# Function run in the worker processes: read one grid document into its Design CSV row
+# (the same cells, in the same order, as the Design button). Returns (path, row, error).
+def read_design_row(file_path):
+    try:
+        document = read_grid_file(file_path)
+    except (OSError, ValueError, UnicodeDecodeError) as error:
+        return file_path, None, str(error)
+    if document["version"] == 1 and not document["cells"] and document["skipped"]:
+        # Some other JSON object (settings, a template...): none of its keys name a cell
+        return file_path, None, "not a grid document (no cell names such as \"01\")"
+    cells = document["cells"]
+    return file_path, [cells.get(position, "").strip() for position in DESIGN_CELLS], None
+
+# Function to turn many grid documents into one Design CSV without the window: files
+# are read by a pool of processes and each row is written as soon as it arrives
+def export_csv_command(args):
+    started = time.perf_counter()
+    written, failed = 0, 0
+    with open(args.output, 'w', newline='', encoding='utf-8') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow([f"{row * GRID_COLUMNS + col + 1:02}" for row, col in DESIGN_CELLS] + ["document"])
+        with multiprocessing.Pool(args.workers) as pool:
+            for file_path, row_data, error in pool.imap_unordered(read_design_row, iter_document_paths(args.inputs), chunksize=8):
+                if error is not None:
+                    print(f"Skipped {file_path}: {error}", file=sys.stderr)
+                    failed += 1
+                    continue
+                writer.writerow(row_data + [file_path])
+                written += 1
+    print(f"Wrote {written} documents to {args.output} in {time.perf_counter() - started:.2f} s"
+          + (f" ({failed} skipped)" if failed else ""))
+    return 0 if written or not failed else 1
+
+# Function to read a worker count argument, which must be at least 1
+def parse_worker_count(value):
+    try:
+        workers = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a whole number: {value!r}") from None
+    if workers < 1:
+        raise argparse.ArgumentTypeError("must be at least 1")
+    return workers
+
+# Function to run the command-line tools
+def run_command_line(argv):
+    parser = argparse.ArgumentParser(description="Writing tool command-line utilities")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build-dictionary", help="compile a dictionary the spell checker can memory-map")
+    build_parser.add_argument("word_lists", nargs="*", help="extra word lists, one word (and optional frequency) per line")
+    build_parser.add_argument("-o", "--output", default=COMPILED_DICTIONARY_PATH, help="where to write the dictionary")
+    build_parser.add_argument("--language", default="en", help="stock pyspellchecker dictionary to start from")
+    build_parser.add_argument("--no-stock", action="store_true", help="only use the given word lists")
+    build_parser.set_defaults(handler=build_dictionary_command)
+    csv_parser = commands.add_parser("export-csv", help="turn grid JSON files into one Design CSV, one row per document")
+    csv_parser.add_argument("inputs", nargs="+", help="grid files (.json or .wtgrid), or folders to search for them")
+    csv_parser.add_argument("-o", "--output", default="design.csv", help="CSV file to write")
+    csv_parser.add_argument("-j", "--workers", type=parse_worker_count, default=os.cpu_count() or 1, help="number of worker processes")
+    csv_parser.set_defaults(handler=export_csv_command)
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+# Everything below builds and runs the window. It only runs when this file is started
+# directly, so worker processes that import it (for example regex scans) stay headless.
+if __name__ == "__main__":
+    # Command-line tools (for example build-dictionary) run without opening the window
+    if len(sys.argv) > 1:
+        sys.exit(run_command_line(sys.argv[1:]))
+
+    # Create main window
+    root = tk.Tk()
+
+    # Load the dictionary in the background while the window is being built
+    start_spell_service()
+
+    # Options menu for modes that stay on while you type
+    menubar = tk.Menu(root)
+    options_menu = tk.Menu(menubar, tearoff=0)
+    menubar.add_cascade(label="Options", menu=options_menu)
+    live_spell_var = tk.BooleanVar(value=False)
+    options_menu.add_checkbutton(label="Live Spell Check", variable=live_spell_var, command=toggle_live_spell)
+    symspell_var = tk.BooleanVar(value=False)
+    options_menu.add_checkbutton(label="Fast Suggestions (SymSpell Index)", variable=symspell_var, command=toggle_symspell)
+    precompute_suggestions_var = tk.BooleanVar(value=True)
+    options_menu.add_checkbutton(label="Prepare Suggestions Before Asking", variable=precompute_suggestions_var)
+    viewport_only_var = tk.BooleanVar(value=False)
+    options_menu.add_checkbutton(label="Highlight Visible Text Only", variable=viewport_only_var)
+    autosave_var = tk.BooleanVar(value=True)
+    options_menu.add_checkbutton(label="Autosave", variable=autosave_var)
+    library_var = tk.BooleanVar(value=True)
+    options_menu.add_checkbutton(label="Add Opened and Saved Documents to Library", variable=library_var)
+    options_menu.add_separator()
+    options_menu.add_command(label="Spell Cache Size...", command=set_spell_cache_size)
+    options_menu.add_command(label="Clear Spell Cache", command=clear_spell_cache)
+
+    # Tools menu for windows that work on the whole grid
+    tools_menu = tk.Menu(menubar, tearoff=0)
+    menubar.add_cascade(label="Tools", menu=tools_menu)
+    tools_menu.add_command(label="Spelling Review Panel", command=open_spelling_review_panel)
+    tools_menu.add_command(label="Spell Cache Stats", command=show_spell_cache_stats)
+    tools_menu.add_command(label="Watch List...", command=open_watch_list)
+    tools_menu.add_command(label="Find and Replace...", command=open_find_replace)
+    tools_menu.add_command(label="Word Frequencies", command=open_word_frequencies)
+    tools_menu.add_command(label="Version History...", command=open_version_history)
+    load_watch_list()
+
+    # Library menu for documents kept in the local database
+    library_menu = tk.Menu(menubar, tearoff=0)
+    menubar.add_cascade(label="Library", menu=library_menu)
+    recent_menu = tk.Menu(library_menu, tearoff=0, postcommand=fill_recent_menu)
+    library_menu.add_cascade(label="Open Recent", menu=recent_menu)
+    library_menu.add_command(label="Search Library...", command=open_library_search)
+    library_menu.add_command(label="Add Folder to Library...", command=add_folder_to_library)
+    root.config(menu=menubar)
+
+    root.rowconfigure([0, 1, 2], weight=1)
+    root.columnconfigure([0, 1, 2], weight=1)
+
+    # Create grid and entries
+    entries = [[None for _ in range(GRID_COLUMNS)] for _ in range(GRID_ROWS)]
+    for row in range(GRID_ROWS):
+        for col in range(GRID_COLUMNS):
+            if (row, col) == MENU_CELL:
+                # Menu items cell
+                frame = tk.Frame(root, bg=['#FFEEEE', '#EEFFEE', '#EEEEFF', '#FFFFEE', '#EEFFFF', '#FFEFFF', '#F0FFF0', '#FFF0F0', '#F0F0FF'][row * 3 + col])
+                frame.grid(row=row, column=col, padx=5, pady=5, sticky="nsew")
+                import_btn = tk.Button(frame, text="Load", command=import_json, font=("TkDefaultFont", 14))
+                import_btn.pack(side=tk.TOP, fill=tk.X)
+                export_btn = tk.Button(frame, text="Save", command=export_json, font=("TkDefaultFont", 14))
+                export_csv_btn = tk.Button(frame, text="Design", command=export_csv, font=("TkDefaultFont", 14))
+                export_csv_btn.pack(side=tk.TOP, fill=tk.X)
+                export_btn.pack(side=tk.TOP, fill=tk.X)
+                highlight_btn = tk.Button(frame, text="Highlight Spelling Errors", command=toggle_highlight, font=("TkDefaultFont", 14))
+                highlight_btn.pack(side=tk.TOP, fill=tk.X)
+                highlight_word_btn = tk.Button(frame, text="Highlight Specific Word", command=highlight_specific_word, font=("TkDefaultFont", 14))
+                highlight_word_btn.pack(side=tk.TOP, fill=tk.X)
+                spell_check_suggest_btn = tk.Button(frame, text="Spell Check with Suggestions", command=spell_check_suggestions, font=("TkDefaultFont", 14))
+                spell_check_suggest_btn.pack(side=tk.TOP, fill=tk.X)
+                increase_font_btn = tk.Button(frame, text="Increase Font Size", command=increase_font_size, font=("TkDefaultFont", 14))
+                increase_font_btn.pack(side=tk.TOP, fill=tk.X)
+                decrease_font_btn = tk.Button(frame, text="Decrease Font Size", command=decrease_font_size, font=("TkDefaultFont", 14))
+                decrease_font_btn.pack(side=tk.TOP, fill=tk.X)
+                template_maker_btn = tk.Button(frame, text="Open Template Maker", command=open_template_maker, font=("TkDefaultFont", 14))
+                template_maker_btn.pack(side=tk.TOP, fill=tk.X)
+                search_label = tk.Label(frame, text="Search all cells:", font=("TkDefaultFont", 10), bg=frame.cget("bg"), anchor="w")
+                search_label.pack(side=tk.TOP, fill=tk.X)
+                search_var = tk.StringVar()
+                search_entry = tk.Entry(frame, textvariable=search_var, font=("TkDefaultFont", 14))
+                search_entry.pack(side=tk.TOP, fill=tk.X)
+                search_var.trace_add("write", on_search_changed)
+                search_mode_frame = tk.Frame(frame, bg=frame.cget("bg"))
+                search_mode_frame.pack(side=tk.TOP, fill=tk.X)
+                search_regex_var = tk.BooleanVar(value=False)
+                search_whole_word_var = tk.BooleanVar(value=False)
+                search_case_var = tk.BooleanVar(value=False)
+                for text, variable in (("Regex", search_regex_var), ("Whole word", search_whole_word_var), ("Match case", search_case_var)):
+                    tk.Checkbutton(search_mode_frame, text=text, variable=variable, command=on_search_changed, font=("TkDefaultFont", 10), bg=frame.cget("bg")).pack(side=tk.LEFT)
+                search_count_label = tk.Label(frame, text="", font=("TkDefaultFont", 10), bg=frame.cget("bg"), wraplength=300, justify=tk.LEFT)
+                search_count_label.pack(side=tk.TOP, fill=tk.X)
+                spell_status_label = tk.Label(frame, text="Dictionary: loading...", font=("TkDefaultFont", 10), bg=frame.cget("bg"))
+                spell_status_label.pack(side=tk.TOP, fill=tk.X)
+                autosave_status_label = tk.Label(frame, text="Autosave: nothing saved yet", font=("TkDefaultFont", 10), bg=frame.cget("bg"), wraplength=300)
+                autosave_status_label.pack(side=tk.TOP, fill=tk.X)
+                load_status_label = tk.Label(frame, text="", font=("TkDefaultFont", 10), bg=frame.cget("bg"), wraplength=300)
+                load_status_label.pack(side=tk.TOP, fill=tk.X)
+            else:
+                # Add cell name as a label
+                cell_name = f"{row * 3 + col + 1:02}"
+                label = tk.Label(root, text=cell_name, font=("TkDefaultFont", 14))
+                label.grid(row=row, column=col, padx=5, pady=(5, 0), sticky="nsew")
+                # Text input fields for other cells
+                frame = tk.Frame(root)
+                frame.grid(row=row, column=col, padx=5, pady=(0, 5), sticky="nsew")
+                entry = tk.Text(frame, wrap='word', height=1, font=("TkDefaultFont", 14), undo=True)
+                entry.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+                scrollbar = tk.Scrollbar(frame, command=entry.yview)
+                scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+                entry.config(yscrollcommand=lambda first, last, row=row, col=col, scrollbar=scrollbar: on_cell_scrolled(row, col, scrollbar, first, last))
+                entry.bind("<<Modified>>", on_cell_modified)
+                entry.bind("<Button-3>", show_cell_context_menu)
+                cell_keys[str(entry)] = (row, col)
+                cell_texts[(row, col)] = ""
+                entries[row][col] = entry
+
+    update_spell_status()
+    recover_session()
+    root.protocol("WM_DELETE_WINDOW", on_close)
+
+    # Start the Tkinter loop
+    root.mainloop()
\ No newline at end of file